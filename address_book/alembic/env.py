@@ -5,6 +5,7 @@ from sqlalchemy import engine_from_config, pool
 
 from src.core.config import get_app_settings
 from src.db.base import Base
+from src.models.model import virtual_metadata
 
 settings = get_app_settings()
 
@@ -15,6 +16,17 @@ fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names):
+    """
+    Keep autogenerate away from virtual tables and their shadow tables.
+    """
+    if type_ == "table":
+        return not any(
+            name.startswith(table_name) for table_name in virtual_metadata.tables
+        )
+    return True
+
+
 def run_migrations_online():
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
@@ -23,7 +35,11 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,86 @@
+"""Address ids autoincrement
+
+Revision ID: 08318241b234
+Revises: 083b9fb73edb
+Create Date: 2024-05-27 09:41:17.316094
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "08318241b234"
+down_revision: Union[str, None] = "083b9fb73edb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def rebuild_addresses(autoincrement: bool) -> None:
+    """
+    Copy `addresses` into a table declared with or without AUTOINCREMENT, which
+    SQLite cannot alter in place, and restore its indexes and triggers.
+    """
+    bind = op.get_bind()
+    schema = bind.exec_driver_sql(
+        """
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = 'addresses' AND type IN ('index', 'trigger')
+            AND sql IS NOT NULL
+        ORDER BY type, name
+        """
+    ).scalars().all()
+    op.create_table(
+        "addresses_rebuild",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("street", sa.String(), nullable=True),
+        sa.Column("city", sa.String(), nullable=True),
+        sa.Column("state", sa.String(), nullable=True),
+        sa.Column("country", sa.String(), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=autoincrement,
+    )
+    op.execute(
+        """
+        INSERT INTO addresses_rebuild
+            (id, street, city, state, country, latitude, longitude,
+             created_at, updated_at)
+        SELECT id, street, city, state, country, latitude, longitude,
+            created_at, updated_at
+        FROM addresses
+        """
+    )
+    # Dropping a table fires no DELETE triggers, so tombstones, facets, the
+    # R*Tree and the full-text index are left as they are.
+    op.execute("DROP TABLE addresses")
+    op.execute("ALTER TABLE addresses_rebuild RENAME TO addresses")
+    for sql in schema:
+        op.execute(sql)
+    if autoincrement:
+        # Never hand out an id that was already used, even by a deleted address.
+        op.execute("DELETE FROM sqlite_sequence WHERE name = 'addresses'")
+        op.execute(
+            """
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT 'addresses', max(id) FROM (
+                SELECT coalesce(max(id), 0) AS id FROM addresses
+                UNION ALL
+                SELECT coalesce(max(id), 0) FROM address_tombstones
+            )
+            """
+        )
+
+
+def upgrade() -> None:
+    rebuild_addresses(autoincrement=True)
+
+
+def downgrade() -> None:
+    rebuild_addresses(autoincrement=False)
@@ -0,0 +1,65 @@
+"""Address change feed
+
+Revision ID: 083b9fb73edb
+Revises: 4f5bb713d32a
+Create Date: 2024-05-20 10:12:41.508236
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "083b9fb73edb"
+down_revision: Union[str, None] = "4f5bb713d32a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE addresses SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP)
+        WHERE updated_at IS NULL
+        """
+    )
+    op.create_index(
+        "ix_addresses_updated_at_id",
+        "addresses",
+        ["updated_at", "id"],
+        unique=False,
+    )
+    op.create_table(
+        "address_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_address_tombstones_deleted_at_id",
+        "address_tombstones",
+        ["deleted_at", "id"],
+        unique=False,
+    )
+    # Maintained by the database, so deletes made outside the API are seen too.
+    op.execute(
+        """
+        CREATE TRIGGER address_tombstones_ad AFTER DELETE ON addresses
+        BEGIN
+            INSERT OR REPLACE INTO address_tombstones (id, deleted_at)
+            VALUES (old.id, CURRENT_TIMESTAMP);
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS address_tombstones_ad")
+    op.drop_index(
+        "ix_address_tombstones_deleted_at_id", table_name="address_tombstones"
+    )
+    op.drop_table("address_tombstones")
+    op.drop_index("ix_addresses_updated_at_id", table_name="addresses")
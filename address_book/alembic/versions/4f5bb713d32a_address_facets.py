@@ -0,0 +1,133 @@
+"""Address facets
+
+Revision ID: 4f5bb713d32a
+Revises: bcb8feca0f2b
+Create Date: 2024-05-13 16:22:08.064517
+
+"""
+
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f5bb713d32a"
+down_revision: Union[str, None] = "bcb8feca0f2b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FACET_KEYS = "(facet, country, state, city)"
+
+
+def facet_keys(row: str, with_total: bool = True) -> List[str]:
+    """
+    The facet keys counting the `new` or `old` row of a trigger, as SQL row
+    values.
+    """
+    country, state, city = (
+        f"coalesce({row}.{column}, '')" for column in ("country", "state", "city")
+    )
+    keys = [
+        f"('country', {country}, '', '')",
+        f"('state', {country}, {state}, '')",
+        f"('city', {country}, {state}, {city})",
+    ]
+    if with_total:
+        keys.insert(0, "('total', '', '', '')")
+    return keys
+
+
+def increment(row: str, with_total: bool = True) -> str:
+    return f"""
+        INSERT INTO address_facets (facet, country, state, city, count)
+        SELECT column1, column2, column3, column4, 1
+        FROM (VALUES {", ".join(facet_keys(row, with_total))}) WHERE true
+        ON CONFLICT {FACET_KEYS} DO UPDATE SET count = count + 1;
+    """
+
+
+def decrement(row: str, with_total: bool = True) -> str:
+    # One statement per key: SQLite only uses the primary key for row value
+    # equality, not for `IN (VALUES ...)`.
+    return "".join(
+        f"""
+        UPDATE address_facets SET count = count - 1 WHERE {FACET_KEYS} = {key};
+        DELETE FROM address_facets
+        WHERE {FACET_KEYS} = {key} AND count <= 0 AND facet != 'total';
+        """
+        for key in facet_keys(row, with_total)
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "address_facets",
+        sa.Column("facet", sa.String(), nullable=False),
+        sa.Column("country", sa.String(), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("city", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("facet", "country", "state", "city"),
+    )
+    op.create_index(
+        "ix_address_facets_facet_count",
+        "address_facets",
+        ["facet", "count"],
+        unique=False,
+    )
+    op.execute(
+        """
+        INSERT INTO address_facets (facet, country, state, city, count)
+        SELECT 'total', '', '', '', count(*) FROM addresses
+        UNION ALL
+        SELECT 'country', coalesce(country, ''), '', '', count(*)
+        FROM addresses GROUP BY 2
+        UNION ALL
+        SELECT 'state', coalesce(country, ''), coalesce(state, ''), '', count(*)
+        FROM addresses GROUP BY 2, 3
+        UNION ALL
+        SELECT
+            'city', coalesce(country, ''), coalesce(state, ''), coalesce(city, ''),
+            count(*)
+        FROM addresses GROUP BY 2, 3, 4
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER address_facets_ai AFTER INSERT ON addresses
+        BEGIN
+            {increment("new")}
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER address_facets_au
+        AFTER UPDATE OF country, state, city ON addresses
+        WHEN old.country IS NOT new.country
+            OR old.state IS NOT new.state
+            OR old.city IS NOT new.city
+        BEGIN
+            {decrement("old", with_total=False)}
+            {increment("new", with_total=False)}
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER address_facets_ad AFTER DELETE ON addresses
+        BEGIN
+            {decrement("old")}
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS address_facets_ad")
+    op.execute("DROP TRIGGER IF EXISTS address_facets_au")
+    op.execute("DROP TRIGGER IF EXISTS address_facets_ai")
+    op.drop_index("ix_address_facets_facet_count", table_name="address_facets")
+    op.drop_table("address_facets")
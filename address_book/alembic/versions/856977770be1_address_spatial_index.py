@@ -0,0 +1,70 @@
+"""Address spatial index
+
+Revision ID: 856977770be1
+Revises: 7e7302a57327
+Create Date: 2024-04-15 10:12:41.503219
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "856977770be1"
+down_revision: Union[str, None] = "7e7302a57327"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE addresses_rtree "
+        "USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+    )
+    op.execute(
+        """
+        INSERT INTO addresses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT id, latitude, latitude, longitude, longitude
+        FROM addresses
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_rtree_ai AFTER INSERT ON addresses
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL
+        BEGIN
+            INSERT INTO addresses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_rtree_au
+        AFTER UPDATE OF id, latitude, longitude ON addresses
+        BEGIN
+            DELETE FROM addresses_rtree WHERE id = old.id;
+            INSERT INTO addresses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_rtree_ad AFTER DELETE ON addresses
+        BEGIN
+            DELETE FROM addresses_rtree WHERE id = old.id;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS addresses_rtree_ad")
+    op.execute("DROP TRIGGER IF EXISTS addresses_rtree_au")
+    op.execute("DROP TRIGGER IF EXISTS addresses_rtree_ai")
+    op.execute("DROP TABLE IF EXISTS addresses_rtree")
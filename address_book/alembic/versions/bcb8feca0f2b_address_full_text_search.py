@@ -0,0 +1,76 @@
+"""Address full text search
+
+Revision ID: bcb8feca0f2b
+Revises: 9fa0dbd7b05f
+Create Date: 2024-05-06 09:41:27.518830
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bcb8feca0f2b"
+down_revision: Union[str, None] = "9fa0dbd7b05f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # External content table: the index reads the text back from `addresses`,
+    # so only the inverted index itself is stored.
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE addresses_fts USING fts5(
+            street, city, state, country,
+            content='addresses',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    op.execute("INSERT INTO addresses_fts (addresses_fts) VALUES ('rebuild')")
+    op.execute(
+        """
+        CREATE TRIGGER addresses_fts_ai AFTER INSERT ON addresses
+        BEGIN
+            INSERT INTO addresses_fts (rowid, street, city, state, country)
+            VALUES (new.id, new.street, new.city, new.state, new.country);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_fts_au
+        AFTER UPDATE OF id, street, city, state, country ON addresses
+        BEGIN
+            INSERT INTO addresses_fts
+                (addresses_fts, rowid, street, city, state, country)
+            VALUES
+                ('delete', old.id, old.street, old.city, old.state, old.country);
+            INSERT INTO addresses_fts (rowid, street, city, state, country)
+            VALUES (new.id, new.street, new.city, new.state, new.country);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_fts_ad AFTER DELETE ON addresses
+        BEGIN
+            INSERT INTO addresses_fts
+                (addresses_fts, rowid, street, city, state, country)
+            VALUES
+                ('delete', old.id, old.street, old.city, old.state, old.country);
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS addresses_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS addresses_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS addresses_fts_ai")
+    op.execute("DROP TABLE IF EXISTS addresses_fts")
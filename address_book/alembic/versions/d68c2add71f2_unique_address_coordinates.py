@@ -0,0 +1,33 @@
+"""Unique address coordinates
+
+Revision ID: d68c2add71f2
+Revises: 856977770be1
+Create Date: 2024-04-22 09:41:07.281644
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d68c2add71f2"
+down_revision: Union[str, None] = "856977770be1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if duplicated coordinates slipped in before the constraint; those
+    # rows must be merged by hand first.
+    op.create_index(
+        "ix_addresses_latitude_longitude",
+        "addresses",
+        ["latitude", "longitude"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_addresses_latitude_longitude", table_name="addresses")
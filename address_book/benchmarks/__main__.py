@@ -0,0 +1,209 @@
+"""
+Reproducible benchmark suite: micro-benchmarks of the helpers and the CRUD
+layer, and in-process HTTP benchmarks of every endpoint, run against a
+database seeded with `benchmarks.datagen`.
+
+Usage:
+    python -m benchmarks run [--rows 10000] [--seed 42] [--output results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+from benchmarks.suite import (
+    BENCHMARKS,
+    Benchmark,
+    Context,
+    compare,
+    environment,
+    measure,
+    print_results,
+    write_results,
+)
+
+GROUPS = ("helpers", "crud", "http")
+
+
+def prepare_database(args: argparse.Namespace) -> int:
+    """
+    Configure, migrate and, unless it already holds addresses, seed the
+    database. Return the number of addresses in it.
+    """
+    from benchmarks.common import use_temporary_database
+
+    if args.database:
+        os.environ["DATABASE_URI"] = f"sqlite:///{Path(args.database).resolve()}"
+    else:
+        use_temporary_database()
+
+    from sqlalchemy import func, select
+
+    from benchmarks.common import migrate, quiet_engines, seed_addresses
+    from src.db.session import engine
+    from src.models.model import Address
+
+    migrate()
+    quiet_engines()
+    with engine.connect() as connection:
+        count = connection.scalar(select(func.count()).select_from(Address))
+    if count:
+        print(f"reusing {count} addresses from {engine.url.database}")
+        return count
+
+    print(f"seeding {args.rows} addresses with seed {args.seed}")
+    seed_addresses(args.rows, seed=args.seed)
+    return args.rows
+
+
+def sample_context(rows: int, args: argparse.Namespace) -> Context:
+    """
+    A context with a seeded sample of the ids and coordinates in the database.
+    """
+    from sqlalchemy import func, select
+
+    from src.db.session import engine
+    from src.models.model import Address
+
+    rng = random.Random(args.seed)
+    with engine.connect() as connection:
+        max_id = connection.scalar(select(func.max(Address.id)))
+        candidates = sorted({rng.randint(1, max_id) for _ in range(1000)})
+        sample = connection.execute(
+            select(Address.id, Address.latitude, Address.longitude).where(
+                Address.id.in_(candidates)
+            )
+        ).all()
+    rng.shuffle(sample)
+    return Context(
+        rows=rows,
+        seed=args.seed,
+        max_id=max_id,
+        points=[(row.latitude, row.longitude) for row in sample],
+        ids=[row.id for row in sample],
+        repeat_scale=args.repeat_scale,
+    )
+
+
+def select_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    import benchmarks.http  # noqa: F401
+    import benchmarks.micro  # noqa: F401
+
+    selected = [
+        bench
+        for bench in BENCHMARKS.values()
+        if (not args.group or bench.group in args.group)
+        and (not args.filter or args.filter in bench.name)
+    ]
+    return sorted(selected, key=lambda bench: GROUPS.index(bench.group))
+
+
+async def run_benchmarks(selected: List[Benchmark], context: Context) -> dict:
+    """
+    Run the benchmarks with the application started, so its in-memory indexes
+    are built, and an HTTP client bound to it.
+    """
+    import httpx
+
+    from src.db.session import async_engine
+    from src.main import create_app
+
+    application = create_app()
+    results = {}
+    try:
+        async with application.router.lifespan_context(application):
+            transport = httpx.ASGITransport(app=application)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://benchmark"
+            ) as client:
+                context.client = client
+                for bench in selected:
+                    result = results[bench.name] = await measure(bench, context)
+                    print(f"{bench.name:<44} {result['median_ms']:>10.3f}")
+    finally:
+        # The lifespan does not get to close the pool when a benchmark fails.
+        await async_engine.dispose()
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    rows = prepare_database(args)
+    selected = select_benchmarks(args)
+    if not selected:
+        print("no benchmark matches the selection")
+        return 1
+
+    context = sample_context(rows, args)
+    # Expected 4xx responses are logged as errors, which would only add noise.
+    logging.disable(logging.ERROR)
+    results = asyncio.run(run_benchmarks(selected, context))
+
+    from src.db.session import engine
+
+    engine.dispose()
+
+    print()
+    print_results(results)
+    if args.output:
+        write_results(Path(args.output), environment(rows, args.seed), results)
+        print(f"\nresults written to {args.output}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.split("\n\n")[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--rows", type=int, default=10_000)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument(
+        "--database",
+        help="SQLite file to use, seeded on first use and reused afterwards "
+        "(default: a fresh temporary database)",
+    )
+    run_parser.add_argument(
+        "--group", action="append", choices=GROUPS, help="run only these groups"
+    )
+    run_parser.add_argument(
+        "-k", dest="filter", help="run only benchmarks whose name contains this"
+    )
+    run_parser.add_argument(
+        "--repeat-scale",
+        type=float,
+        default=1.0,
+        help="multiply the number of timed runs of every benchmark",
+    )
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare two result files and flag regressions"
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative median change reported as a regression or improvement",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        return run(args)
+
+    regressions, improvements = compare(args.baseline, args.current, args.threshold)
+    print(f"\n{len(regressions)} regressions, {len(improvements)} improvements")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
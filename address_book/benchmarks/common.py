@@ -0,0 +1,59 @@
+"""
+Shared helpers for the benchmarks.
+
+Benchmarks run against a throwaway SQLite database, so `use_temporary_database`
+must be called before anything from `src` is imported.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+
+
+def use_temporary_database() -> Path:
+    """
+    Point the application at a fresh SQLite file in a temporary directory.
+    """
+    path = Path(tempfile.mkdtemp(prefix="address_book_bench_")) / "bench.db"
+    os.environ["DATABASE_URI"] = f"sqlite:///{path}"
+    return path
+
+
+def migrate() -> None:
+    """
+    Apply every Alembic migration to the configured database.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    command.upgrade(config, "head")
+
+
+def seed_addresses(count: int, seed: int = 42) -> None:
+    """
+    Insert `count` synthetic addresses from `benchmarks.datagen`, one
+    transaction per chunk.
+    """
+    from sqlalchemy import insert
+
+    from benchmarks.datagen import generate_addresses
+    from src.db.session import engine
+    from src.models.model import Address
+
+    for rows in generate_addresses(count, seed=seed):
+        with engine.begin() as connection:
+            connection.execute(insert(Address), rows)
+
+
+def quiet_engines() -> None:
+    """
+    Disable SQL echo so logging does not dominate the measurements.
+    """
+    from src.db.session import async_engine, engine
+
+    engine.echo = False
+    async_engine.echo = False
@@ -0,0 +1,142 @@
+"""
+Mixed-load latency benchmark of the blocking and the async database layers.
+
+"before" mounts the previous routes, `async def` endpoints running queries on
+a synchronous `Session`; "after" is the application from `create_app`. Both are
+driven in-process through the ASGI interface by concurrent clients issuing a
+mix of heavy `/address/near` queries and light single-address lookups.
+
+Keep `--clients` below the connection pool capacity: past it the "before"
+routes block the event loop waiting for a connection that can only be
+released by that same loop, and stall until the pool timeout.
+
+Usage:
+    python -m benchmarks.concurrency [--rows 50000] [--clients 10] [--requests 40]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.common import (
+    migrate,
+    quiet_engines,
+    seed_addresses,
+    use_temporary_database,
+)
+
+use_temporary_database()
+
+from typing import List  # noqa: E402
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, Depends, FastAPI  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.db.session import async_engine, get_db  # noqa: E402
+from src.helpers.crud_base import CrudBase  # noqa: E402
+from src.helpers.utils import (  # noqa: E402
+    bounding_boxes,
+    find_coordinates_within_radius,
+    within_bounding_boxes,
+)
+from src.main import create_app  # noqa: E402
+from src.models.model import Address  # noqa: E402
+from src.schemas.address_schemas import AddressOut, NearBySchema  # noqa: E402
+from src.schemas.response import Response  # noqa: E402
+
+
+def create_blocking_app() -> FastAPI:
+    """
+    The routes as they were before the async database layer.
+    """
+    router = APIRouter()
+
+    @router.get("/address/near", response_model=Response[List[AddressOut]])
+    async def get_nearby_addresses(
+        user_input: NearBySchema = Depends(), db: Session = Depends(get_db)
+    ):
+        boxes = bounding_boxes(
+            user_input.latitude, user_input.longitude, user_input.radius
+        )
+        addresses = CrudBase(Address).get_multi(
+            db, query_filter=within_bounding_boxes(boxes)
+        )
+        return Response(
+            data=find_coordinates_within_radius(
+                user_input.latitude, user_input.longitude, addresses, user_input.radius
+            )
+        )
+
+    @router.get("/addresses/{address_id}", response_model=Response[AddressOut])
+    async def get_single_address(address_id: int, db: Session = Depends(get_db)):
+        return Response(
+            data=CrudBase(Address).get(db, query_filter=Address.id == address_id)
+        )
+
+    application = FastAPI()
+    application.include_router(router, prefix="/api/v1")
+    return application
+
+
+async def client(
+    http: httpx.AsyncClient, rng: random.Random, requests: int, rows: int, light: list
+) -> None:
+    for _ in range(requests):
+        if rng.random() < 0.2:
+            await http.get(
+                "/api/v1/address/near",
+                params={
+                    "latitude": rng.uniform(-60, 60),
+                    "longitude": rng.uniform(-170, 170),
+                    "radius": 2000,
+                },
+            )
+        else:
+            start = time.perf_counter()
+            await http.get(f"/api/v1/addresses/{rng.randint(1, rows)}")
+            light.append(time.perf_counter() - start)
+
+
+async def measure(application: FastAPI, args: argparse.Namespace) -> List[float]:
+    light: List[float] = []
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        await asyncio.gather(
+            *[
+                client(http, random.Random(index), args.requests, args.rows, light)
+                for index in range(args.clients)
+            ]
+        )
+    await async_engine.dispose()
+    return light
+
+
+def report(label: str, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:>8} {p50 * 1000:>10.2f} {p99 * 1000:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+
+    migrate()
+    seed_addresses(args.rows)
+    quiet_engines()
+
+    print("single-address lookup latency under mixed load")
+    print(f"{'layer':>8} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    report("before", asyncio.run(measure(create_blocking_app(), args)))
+    report("after", asyncio.run(measure(create_app(), args)))
+
+
+if __name__ == "__main__":
+    main()
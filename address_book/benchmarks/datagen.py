@@ -0,0 +1,132 @@
+"""
+Deterministic synthetic addresses, clustered like real ones.
+
+Addresses are drawn around a fixed list of metropolitan areas, weighted by
+size, with a density falling off exponentially from each center, plus a
+small share spread over the inhabited latitudes. City names follow the
+districts of each metro, so faceting, suggestions and search see realistic
+skew. The same `count` and `seed` always produce the same rows.
+"""
+
+import math
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+# (city, state, country, latitude, longitude, weight, radius in km)
+METROS = [
+    ("Tokyo", "Tokyo", "Japan", 35.6895, 139.6917, 37, 30),
+    ("Delhi", "Delhi", "India", 28.7041, 77.1025, 31, 25),
+    ("Shanghai", "Shanghai", "China", 31.2304, 121.4737, 27, 25),
+    ("Sao Paulo", "Sao Paulo", "Brazil", -23.5505, -46.6333, 22, 25),
+    ("Mexico City", "CDMX", "Mexico", 19.4326, -99.1332, 22, 25),
+    ("Cairo", "Cairo", "Egypt", 30.0444, 31.2357, 21, 20),
+    ("Mumbai", "Maharashtra", "India", 19.0760, 72.8777, 20, 15),
+    ("Beijing", "Beijing", "China", 39.9042, 116.4074, 20, 25),
+    ("Dhaka", "Dhaka", "Bangladesh", 23.8103, 90.4125, 21, 12),
+    ("Osaka", "Osaka", "Japan", 34.6937, 135.5023, 19, 20),
+    ("New York", "New York", "United States", 40.7128, -74.0060, 18, 25),
+    ("Karachi", "Sindh", "Pakistan", 24.8607, 67.0011, 16, 15),
+    ("Buenos Aires", "Buenos Aires", "Argentina", -34.6037, -58.3816, 15, 20),
+    ("Istanbul", "Istanbul", "Turkey", 41.0082, 28.9784, 15, 20),
+    ("Lagos", "Lagos", "Nigeria", 6.5244, 3.3792, 15, 15),
+    ("Manila", "Metro Manila", "Philippines", 14.5995, 120.9842, 14, 15),
+    ("Rio de Janeiro", "Rio de Janeiro", "Brazil", -22.9068, -43.1729, 13, 20),
+    ("Los Angeles", "California", "United States", 34.0522, -118.2437, 12, 35),
+    ("Moscow", "Moscow", "Russia", 55.7558, 37.6173, 12, 20),
+    ("Paris", "Ile-de-France", "France", 48.8566, 2.3522, 11, 15),
+    ("Jakarta", "Jakarta", "Indonesia", -6.2088, 106.8456, 11, 20),
+    ("London", "England", "United Kingdom", 51.5074, -0.1278, 9, 20),
+    ("Chicago", "Illinois", "United States", 41.8781, -87.6298, 9, 25),
+    ("Lima", "Lima", "Peru", -12.0464, -77.0428, 11, 15),
+    ("Bangkok", "Bangkok", "Thailand", 13.7563, 100.5018, 10, 20),
+    ("Seoul", "Seoul", "South Korea", 37.5665, 126.9780, 10, 15),
+    ("Johannesburg", "Gauteng", "South Africa", -26.2041, 28.0473, 6, 20),
+    ("Madrid", "Madrid", "Spain", 40.4168, -3.7038, 7, 12),
+    ("Toronto", "Ontario", "Canada", 43.6532, -79.3832, 6, 20),
+    ("Sydney", "New South Wales", "Australia", -33.8688, 151.2093, 5, 25),
+    ("Berlin", "Berlin", "Germany", 52.5200, 13.4050, 4, 12),
+    ("Nairobi", "Nairobi", "Kenya", -1.2921, 36.8219, 5, 12),
+]
+
+# Share of addresses outside any metro.
+RURAL_SHARE = 0.05
+
+DISTRICTS = ("North", "East", "South", "West")
+
+STREET_NAMES = (
+    "Main", "Oak", "Maple", "Park", "Cedar", "Elm", "Lake", "Hill", "Pine",
+    "Church", "Station", "Mill", "River", "Market", "King", "Queen", "High",
+    "Bridge", "Garden", "Forest", "Victoria", "Harbour", "Spring", "Valley",
+)  # fmt: skip
+
+STREET_TYPES = ("Street", "Road", "Avenue", "Lane", "Boulevard", "Way", "Drive")
+
+KM_PER_DEGREE = 111.195
+
+
+def generate_addresses(
+    count: int, seed: int = 42, chunk_size: int = 50_000
+) -> Iterator[List[Dict]]:
+    """
+    Yield `count` address dicts, ready for an executemany INSERT, in lists of
+    at most `chunk_size`.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array([metro[5] for metro in METROS], dtype=np.float64)
+    weights /= weights.sum()
+    centers = np.array([metro[3:5] for metro in METROS], dtype=np.float64)
+    radii = np.array([metro[6] for metro in METROS], dtype=np.float64)
+
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        metro = rng.choice(len(METROS), size=size, p=weights)
+        distance = rng.exponential(radii[metro] / 3)
+        bearing = rng.uniform(0, 2 * math.pi, size)
+        latitude = centers[metro, 0] + distance / KM_PER_DEGREE * np.cos(bearing)
+        longitude = centers[metro, 1] + distance / (
+            KM_PER_DEGREE * np.cos(np.radians(centers[metro, 0]))
+        ) * np.sin(bearing)
+
+        rural = rng.random(size) < RURAL_SHARE
+        latitude[rural] = rng.uniform(-55, 70, rural.sum())
+        longitude[rural] = rng.uniform(-180, 180, rural.sum())
+        latitude = np.clip(latitude, -89.999, 89.999)
+        longitude = (longitude + 180) % 360 - 180
+
+        ring = np.minimum((distance / radii[metro] * 3).astype(np.int64), 3)
+        district = ((bearing + math.pi / 4) // (math.pi / 2)).astype(np.int64) % 4
+        house = rng.integers(1, 2000, size)
+        street = rng.integers(0, len(STREET_NAMES), size)
+        street_type = rng.integers(0, len(STREET_TYPES), size)
+
+        rows = []
+        for index in range(size):
+            if rural[index]:
+                region = (
+                    f"{int(latitude[index] // 5 * 5)}:{int(longitude[index] // 5 * 5)}"
+                )
+                city, state, country = (
+                    f"Rural {region}",
+                    f"Region {region}",
+                    "Unincorporated",
+                )
+            else:
+                name, state, country = METROS[metro[index]][:3]
+                city = (
+                    name
+                    if ring[index] == 0
+                    else f"{name} {DISTRICTS[district[index]]} {ring[index]}"
+                )
+            rows.append(
+                {
+                    "street": f"{house[index]} {STREET_NAMES[street[index]]} "
+                    f"{STREET_TYPES[street_type[index]]}",
+                    "city": city,
+                    "state": state,
+                    "country": country,
+                    "latitude": float(latitude[index]),
+                    "longitude": float(longitude[index]),
+                }
+            )
+        yield rows
@@ -0,0 +1,143 @@
+"""
+Write and read throughput of SQLite with and without the performance profile.
+
+Each profile gets its own copy of a seeded database and an engine built by
+`src.db.session` from the application settings, so only the connection
+pragmas differ. Writes are single-row insert transactions, as issued by
+`POST /addresses/`; reads are primary key lookups, first alone and then
+from several threads while a writer keeps committing.
+
+Usage:
+    python -m benchmarks.engine [--rows 50000] [--writes 2000] [--reads 20000]
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import threading
+import time
+
+from benchmarks.common import migrate, seed_addresses, use_temporary_database
+
+database_path = use_temporary_database()
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from src.core.config import get_app_settings  # noqa: E402
+from src.db.session import apply_sqlite_profile, engine_kwargs  # noqa: E402
+from src.db.session import engine as app_engine  # noqa: E402
+from src.models.model import Address  # noqa: E402
+
+PROFILES = ("default", "performance")
+
+
+def profile_engine(profile: str) -> Engine:
+    """
+    An engine on a fresh copy of the seeded database using `profile`.
+    """
+    path = database_path.with_name(f"{profile}.db")
+    shutil.copyfile(database_path, path)
+    # The journal mode is stored in the file, so reset the seeded one's.
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.close()
+    url = f"sqlite:///{path}"
+    settings = get_app_settings().model_copy(update={"sqlite_profile": profile})
+    engine = create_engine(url, future=True, **engine_kwargs(url, settings))
+    apply_sqlite_profile(engine, settings)
+    return engine
+
+
+def write(engine: Engine, count: int, offset: int = 0) -> float:
+    """
+    Commit `count` inserts one at a time and return the elapsed seconds.
+    """
+    start = time.perf_counter()
+    for index in range(offset, offset + count):
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Address).values(
+                    street=f"{index} Bench Street",
+                    city="Bench",
+                    state="Bench",
+                    country="Bench",
+                    latitude=-89 + index * 1e-6,
+                    longitude=-179 + index * 1e-6,
+                )
+            )
+    return time.perf_counter() - start
+
+
+def read(engine: Engine, count: int, rows: int, seed: int = 0) -> float:
+    """
+    Run `count` primary key lookups and return the elapsed seconds.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        for _ in range(count):
+            connection.execute(
+                select(Address).where(Address.id == rng.randint(1, rows))
+            ).first()
+    return time.perf_counter() - start
+
+
+def mixed(engine: Engine, args: argparse.Namespace) -> float:
+    """
+    Reads per second over `--threads` readers while one writer commits.
+    """
+    per_thread = args.reads // args.threads
+    done = threading.Event()
+
+    def writer() -> None:
+        index = 10 * args.writes
+        while not done.is_set():
+            write(engine, 10, offset=index)
+            index += 10
+
+    writer_thread = threading.Thread(target=writer)
+    readers = [
+        threading.Thread(target=read, args=(engine, per_thread, args.rows, seed))
+        for seed in range(args.threads)
+    ]
+    writer_thread.start()
+    start = time.perf_counter()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    writer_thread.join()
+    return per_thread * args.threads / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--writes", type=int, default=2_000)
+    parser.add_argument("--reads", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    migrate()
+    seed_addresses(args.rows)
+    # Closing the last connection checkpoints the seeded rows into the file.
+    app_engine.dispose()
+
+    print(f"{'profile':>12} {'writes/s':>10} {'reads/s':>10} {'mixed reads/s':>14}")
+    for profile in PROFILES:
+        engine = profile_engine(profile)
+        writes = args.writes / write(engine, args.writes)
+        reads = args.reads / read(engine, args.reads, args.rows)
+        print(
+            f"{profile:>12} {writes:>10.0f} {reads:>10.0f} "
+            f"{mixed(engine, args):>14.0f}"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
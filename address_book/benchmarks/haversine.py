@@ -0,0 +1,66 @@
+"""
+Compare the scalar `haversine` loop against the vectorized `haversine_batch`.
+
+Usage:
+    python -m benchmarks.haversine
+"""
+
+import random
+import time
+
+import numpy as np
+
+from src.helpers.utils import haversine, haversine_batch
+
+SIZES = (10_000, 100_000, 1_000_000)
+TARGET = (48.8566, 2.3522)
+RADIUS = 1000.0
+
+
+def run_loop(latitudes: list, longitudes: list) -> list:
+    """
+    The per-address loop `find_coordinates_within_radius` used to run.
+    """
+    return [
+        haversine(TARGET[0], TARGET[1], lat, lon) <= RADIUS
+        for lat, lon in zip(latitudes, longitudes)
+    ]
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'points':>10} {'loop (s)':>10} {'batch (s)':>10} {'speedup':>8}")
+    for size in SIZES:
+        latitudes = [rng.uniform(-90, 90) for _ in range(size)]
+        longitudes = [rng.uniform(-180, 180) for _ in range(size)]
+        lat_array = np.array(latitudes, dtype=np.float64)
+        lon_array = np.array(longitudes, dtype=np.float64)
+
+        loop_mask, loop_time = timed(run_loop, latitudes, longitudes)
+        (distances, batch_mask), batch_time = timed(
+            haversine_batch, TARGET[0], TARGET[1], lat_array, lon_array, RADIUS
+        )
+
+        expected = np.array(
+            [
+                haversine(TARGET[0], TARGET[1], lat, lon)
+                for lat, lon in zip(latitudes[:1000], longitudes[:1000])
+            ]
+        )
+        assert np.allclose(distances[:1000], expected, rtol=1e-9, atol=1e-6)
+        assert np.array_equal(batch_mask, np.array(loop_mask))
+
+        print(
+            f"{size:>10} {loop_time:>10.4f} {batch_time:>10.4f} "
+            f"{loop_time / batch_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+In-process HTTP benchmarks of every endpoint, sent through the ASGI interface
+of the application from `src.main.create_app`.
+
+Imported by `python -m benchmarks` once the database has been configured.
+"""
+
+import itertools
+import math
+import random
+
+from sqlalchemy import func, insert, select
+
+from benchmarks.suite import Context, benchmark
+from src.db.session import engine
+from src.models.model import Address
+from src.schemas.pagination import encode_cursor
+
+API = "/api/v1"
+
+# One city holding many addresses, for keyset pages deep inside a single group.
+DEEP_GROUP_CITY = "Benchmark Deep Group"
+DEEP_GROUP_SIZE = 50_000
+
+
+def _new_address(index: int) -> dict:
+    # Far south of the generated data, so new coordinates never collide.
+    return {
+        "street": f"{index} Benchmark Road",
+        "city": "Benchmark",
+        "state": "Benchmark",
+        "country": "Benchmark",
+        "latitude": -80 - index * 1e-6,
+        "longitude": 170 - index * 1e-6,
+    }
+
+
+def _counter(context: Context):
+    """
+    Address indexes not used by any other write benchmark in this run.
+    """
+    return context.state.setdefault("counter", itertools.count(1))
+
+
+def get(context: Context, path: str, params_list: list):
+    """
+    An operation sending GET `path` with each of `params_list` in turn.
+    """
+    params = itertools.cycle(params_list)
+
+    async def run():
+        response = await context.client.get(API + path, params=next(params))
+        assert response.status_code < 500, response.text
+
+    return run
+
+
+@benchmark("list_first_page", group="http")
+def bench_list(context: Context):
+    return get(context, "/addresses/", [{"limit": 100}])
+
+
+@benchmark("list_deep_offset", group="http", repeat=20)
+def bench_list_offset(context: Context):
+    return get(context, "/addresses/", [{"limit": 100, "page": context.rows // 200}])
+
+
+@benchmark("list_deep_cursor", group="http")
+async def bench_list_cursor(context: Context):
+    response = await context.client.get(
+        API + "/addresses/", params={"limit": 100, "page": context.rows // 200}
+    )
+    cursor = response.json()["next_cursor"]
+    return get(context, "/addresses/", [{"limit": 100, "cursor": cursor}])
+
+
+@benchmark("list_sparse_fields", group="http")
+def bench_list_sparse(context: Context):
+    return get(
+        context, "/addresses/", [{"limit": 500, "fields": "id,latitude,longitude"}]
+    )
+
+
+@benchmark("get_by_id", group="http", repeat=200)
+def bench_get_by_id(context: Context):
+    ids = itertools.cycle(context.ids)
+
+    async def run():
+        response = await context.client.get(f"{API}/addresses/{next(ids)}")
+        assert response.status_code < 500, response.text
+
+    return run
+
+
+@benchmark("get_by_ids_100", group="http")
+def bench_get_by_ids(context: Context):
+    ids = ",".join(str(address_id) for address_id in context.ids[:100])
+    return get(context, "/addresses/", [{"ids": ids}])
+
+
+@benchmark("near_5km", group="http")
+def bench_near(context: Context):
+    return get(
+        context,
+        "/address/near",
+        [
+            {"latitude": lat, "longitude": lon, "radius": 5}
+            for lat, lon in context.points[:200]
+        ],
+    )
+
+
+@benchmark("near_5km_repeated", group="http")
+def bench_near_repeated(context: Context):
+    lat, lon = context.points[0]
+    return get(
+        context, "/address/near", [{"latitude": lat, "longitude": lon, "radius": 5}]
+    )
+
+
+@benchmark("nearest_k10", group="http")
+def bench_nearest(context: Context):
+    return get(
+        context,
+        "/address/nearest",
+        [{"latitude": lat, "longitude": lon, "k": 10} for lat, lon in context.points],
+    )
+
+
+def _post(context: Context, path: str, body: dict):
+    """
+    An operation POSTing `body` to `path`.
+    """
+
+    async def run():
+        response = await context.client.post(API + path, json=body)
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+def _stream(context: Context, path: str, body: dict):
+    """
+    An operation POSTing `body` to `path` and reading the whole streamed body.
+    """
+
+    async def run():
+        async with context.client.stream("POST", API + path, json=body) as response:
+            assert response.status_code == 200, response.status_code
+            async for _ in response.aiter_bytes():
+                pass
+
+    return run
+
+
+@benchmark("within_polygon_1k_vertices", group="http")
+def bench_within_polygon(context: Context):
+    # A wobbly ring of about 20 km around a sampled address.
+    lat, lon = context.points[0]
+    ring = [
+        [
+            lon + (0.2 + 0.02 * math.sin(7 * angle)) * math.cos(angle),
+            lat + (0.15 + 0.015 * math.sin(7 * angle)) * math.sin(angle),
+        ]
+        for angle in (2 * math.pi * index / 1000 for index in range(1000))
+    ]
+    return _stream(
+        context,
+        "/address/within",
+        {"polygon": {"type": "Polygon", "coordinates": [ring]}},
+    )
+
+
+@benchmark("within_bbox", group="http")
+def bench_within_bbox(context: Context):
+    lat, lon = context.points[0]
+    return _stream(
+        context,
+        "/address/within",
+        {"bbox": [lon - 0.2, lat - 0.15, lon + 0.2, lat + 0.15]},
+    )
+
+
+@benchmark("distance_matrix_100x1000", group="http")
+def bench_distance_matrix(context: Context):
+    origins = [{"latitude": lat, "longitude": lon} for lat, lon in context.points[:100]]
+    return _post(
+        context, "/address/distance-matrix", {"origins": origins, "ids": context.ids}
+    )
+
+
+@benchmark("distance_matrix_100x1000_top10", group="http")
+def bench_distance_matrix_top_k(context: Context):
+    origins = [{"latitude": lat, "longitude": lon} for lat, lon in context.points[:100]]
+    return _post(
+        context,
+        "/address/distance-matrix",
+        {"origins": origins, "ids": context.ids, "k": 10},
+    )
+
+
+@benchmark("search", group="http")
+def bench_search(context: Context):
+    return get(
+        context,
+        "/addresses/search",
+        [{"q": q} for q in ("main street", "paris north", "oak", "tokyo 2", "riv")],
+    )
+
+
+@benchmark("suggest", group="http", repeat=200)
+def bench_suggest(context: Context):
+    return get(
+        context,
+        "/addresses/suggest",
+        [
+            {"field": field, "prefix": prefix}
+            for field, prefix in (("city", "T"), ("city", "New"), ("country", "U"))
+        ],
+    )
+
+
+@benchmark("changes_500", group="http")
+def bench_changes(context: Context):
+    return get(context, "/addresses/changes", [{"limit": 500}])
+
+
+@benchmark("facets", group="http")
+def bench_facets(context: Context):
+    return get(
+        context,
+        "/addresses/facets",
+        [{"facet": "country"}, {"facet": "city", "country": "Japan"}],
+    )
+
+
+@benchmark("cache_stats", group="http", repeat=200)
+def bench_cache_stats(context: Context):
+    return get(context, "/address/cache-stats", [{}])
+
+
+@benchmark("metrics", group="http", repeat=100)
+def bench_metrics(context: Context):
+    async def run():
+        response = await context.client.get("/metrics")
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+@benchmark("export_ndjson", group="http", repeat=3)
+def bench_export(context: Context):
+    async def run():
+        async with context.client.stream(
+            "GET", API + "/addresses/export", params={"format": "ndjson"}
+        ) as response:
+            async for _ in response.aiter_bytes():
+                pass
+
+    return run
+
+
+@benchmark("create", group="http", repeat=100)
+def bench_create(context: Context):
+    counter = _counter(context)
+
+    async def run():
+        response = await context.client.post(
+            API + "/addresses/", json=_new_address(next(counter))
+        )
+        assert response.status_code == 201, response.text
+
+    return run
+
+
+@benchmark("bulk_create_100", group="http", repeat=20)
+def bench_bulk_create(context: Context):
+    counter = _counter(context)
+
+    async def run():
+        rows = [_new_address(next(counter)) for _ in range(100)]
+        response = await context.client.post(API + "/addresses/bulk", json=rows)
+        assert response.status_code < 300, response.text
+
+    return run
+
+
+@benchmark("update", group="http", repeat=100)
+async def bench_update(context: Context):
+    rng = random.Random(context.seed)
+    bodies = []
+    for address_id in context.ids[:100]:
+        response = await context.client.get(f"{API}/addresses/{address_id}")
+        bodies.append(response.json()["data"])
+    bodies = itertools.cycle(bodies)
+
+    async def run():
+        body = dict(next(bodies))
+        address_id = body.pop("id")
+        body["street"] = f"{rng.randint(1, 2000)} Updated Road"
+        response = await context.client.put(f"{API}/addresses/{address_id}", json=body)
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+@benchmark("patch", group="http", repeat=100)
+def bench_patch(context: Context):
+    rng = random.Random(context.seed)
+    ids = itertools.cycle(context.ids[:100])
+
+    async def run():
+        response = await context.client.patch(
+            f"{API}/addresses/{next(ids)}",
+            json={"street": f"{rng.randint(1, 2000)} Patched Road"},
+        )
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+@benchmark("delete", group="http", repeat=100)
+async def bench_delete(context: Context):
+    counter = _counter(context)
+    ids = []
+    for _ in range(context.runs(100)):
+        response = await context.client.post(
+            API + "/addresses/", json=_new_address(next(counter))
+        )
+        ids.append(response.json()["data"]["id"])
+    pool = iter(ids)
+
+    async def run():
+        response = await context.client.delete(f"{API}/addresses/{next(pool)}")
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+@benchmark("list_city_cursor_deep_group", group="http")
+def bench_list_cursor_deep_group(context: Context):
+    # Seeded on first use and kept, like the rows of the write benchmarks.
+    with engine.begin() as connection:
+        count = connection.scalar(
+            select(func.count()).where(Address.city == DEEP_GROUP_CITY)
+        )
+        if not count:
+            connection.execute(
+                insert(Address),
+                [
+                    {
+                        "street": f"{index} Deep Group Road",
+                        "city": DEEP_GROUP_CITY,
+                        "state": "Benchmark",
+                        "country": "Benchmark",
+                        "latitude": -70 - index * 1e-6,
+                        "longitude": -170 + index * 1e-6,
+                    }
+                    for index in range(DEEP_GROUP_SIZE)
+                ],
+            )
+        after_id = connection.scalar(
+            select(Address.id)
+            .where(Address.city == DEEP_GROUP_CITY)
+            .order_by(Address.id)
+            .offset(DEEP_GROUP_SIZE * 9 // 10)
+            .limit(1)
+        )
+    cursor = encode_cursor("city", [DEEP_GROUP_CITY, after_id])
+    return get(
+        context, "/addresses/", [{"limit": 100, "sort": "city", "cursor": cursor}]
+    )
@@ -0,0 +1,135 @@
+"""
+Overhead of the request metrics and SQL instrumentation.
+
+"before" is the application from `create_app` with `metrics_enabled` off and
+the statement hooks removed from the engines; "after" is the same
+application instrumented. Both serve the same sequence of single-address
+lookups, list pages and near queries in-process through the ASGI interface,
+alternating which goes first in each round so drift affects both alike.
+
+Usage:
+    python -m benchmarks.instrumentation [--rows 20000] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.common import (
+    migrate,
+    quiet_engines,
+    seed_addresses,
+    use_temporary_database,
+)
+
+use_temporary_database()
+
+import logging  # noqa: E402
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from src.core.config import get_app_settings  # noqa: E402
+from src.db.session import async_engine, engine  # noqa: E402
+from src.helpers.metrics import (  # noqa: E402
+    after_cursor_execute,
+    before_cursor_execute,
+)
+from src.main import create_app  # noqa: E402
+
+ENGINES = (engine, async_engine.sync_engine)
+
+
+def set_instrumented(enabled: bool) -> None:
+    """
+    Turn the metrics middleware of the next `create_app`, and the statement
+    hooks of both engines, on or off.
+    """
+    get_app_settings().metrics_enabled = enabled
+    for target in ENGINES:
+        for name, hook in (
+            ("before_cursor_execute", before_cursor_execute),
+            ("after_cursor_execute", after_cursor_execute),
+        ):
+            if enabled and not event.contains(target, name, hook):
+                event.listen(target, name, hook)
+            elif not enabled and event.contains(target, name, hook):
+                event.remove(target, name, hook)
+
+
+def request_mix(rows: int, count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            paths.append((f"/api/v1/addresses/{rng.randint(1, rows)}", None))
+        elif kind < 0.9:
+            paths.append(
+                ("/api/v1/addresses/", {"limit": 20, "page": rng.randint(1, 50)})
+            )
+        else:
+            paths.append(
+                (
+                    "/api/v1/address/near",
+                    {"latitude": 35.68, "longitude": 139.69, "radius": 2},
+                )
+            )
+    return paths
+
+
+async def serve(enabled: bool, paths: list) -> float:
+    """
+    Send every request of `paths` in turn and return the mean seconds each.
+    """
+    set_instrumented(enabled)
+    application = create_app()
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        start = time.perf_counter()
+        for path, params in paths:
+            await client.get(path, params=params)
+        return (time.perf_counter() - start) / len(paths)
+
+
+async def measure(paths: list, rounds: int) -> dict:
+    timings = {"before": [], "after": []}
+    application = create_app()
+    async with application.router.lifespan_context(application):
+        await serve(True, paths[:100])
+        for round in range(rounds):
+            order = ("before", "after") if round % 2 else ("after", "before")
+            for label in order:
+                timings[label].append(await serve(label == "after", paths))
+    return {label: statistics.median(values) for label, values in timings.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+
+    migrate()
+    quiet_engines()
+    seed_addresses(args.rows)
+    logging.disable(logging.ERROR)
+
+    results = asyncio.run(measure(request_mix(args.rows, args.requests), args.rounds))
+    print(f"{'app':>8} {'us/request':>12}")
+    for label, seconds in results.items():
+        print(f"{label:>8} {seconds * 1e6:>12.1f}")
+    overhead = results["after"] - results["before"]
+    print(
+        f"overhead: {overhead * 1e6:.1f} us/request "
+        f"({overhead / results['before'] * 100:.1f}%)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks of the helpers and of the CRUD layer, run against the seeded
+database without going through HTTP.
+
+Imported by `python -m benchmarks` once the database has been configured.
+"""
+
+import random
+
+import numpy as np
+from sqlalchemy import select
+
+from benchmarks.suite import Context, benchmark
+from src.db.session import AsyncSessionLocal, SessionLocal
+from src.helpers.crud_base import CrudBase
+from src.helpers.export import EXPORT_COLUMNS, ndjson_chunk
+from src.helpers.metrics import MetricsMiddleware
+from src.helpers.near_cache import NearQueryCache
+from src.helpers.search import search_addresses
+from src.helpers.spatial_index import nearest_index
+from src.helpers.suggest import suggest_index
+from src.helpers.utils import (
+    bounding_boxes,
+    find_coordinates_within_radius,
+    find_existing_lat_long,
+    haversine,
+    haversine_batch,
+    haversine_matrix,
+)
+from src.models.model import Address
+from src.schemas.address_schemas import AddressCreate
+from src.schemas.pagination import SkipLimit
+
+
+def _rng(context: Context) -> random.Random:
+    return random.Random(context.seed)
+
+
+@benchmark("haversine_x10k", group="helpers")
+def bench_haversine(context: Context):
+    points = context.points[:100]
+
+    def run():
+        for lat, lon in points:
+            for other_lat, other_lon in points:
+                haversine(lat, lon, other_lat, other_lon)
+
+    return run
+
+
+@benchmark("haversine_batch_100k", group="helpers")
+def bench_haversine_batch(context: Context):
+    generator = np.random.default_rng(context.seed)
+    latitudes = generator.uniform(-90, 90, 100_000)
+    longitudes = generator.uniform(-180, 180, 100_000)
+    lat, lon = context.points[0]
+    return lambda: haversine_batch(lat, lon, latitudes, longitudes, 100.0)
+
+
+@benchmark("haversine_matrix_1000x1000", group="helpers")
+def bench_haversine_matrix(context: Context):
+    generator = np.random.default_rng(context.seed)
+    latitudes = generator.uniform(-90, 90, 1000)
+    longitudes = generator.uniform(-180, 180, 1000)
+    origin_lats, origin_lons = zip(*context.points[:1000])
+
+    def run():
+        for _ in haversine_matrix(origin_lats, origin_lons, latitudes, longitudes):
+            pass
+
+    return run
+
+
+@benchmark("find_coordinates_within_radius_10k", group="helpers")
+def bench_find_coordinates(context: Context):
+    with SessionLocal() as session:
+        addresses = session.scalars(select(Address).limit(10_000)).all()
+    lat, lon = context.points[0]
+    return lambda: find_coordinates_within_radius(lat, lon, addresses, 50.0)
+
+
+@benchmark("bounding_boxes_x1k", group="helpers")
+def bench_bounding_boxes(context: Context):
+    points = context.points[:1000]
+
+    def run():
+        for lat, lon in points:
+            bounding_boxes(lat, lon, 25.0)
+
+    return run
+
+
+@benchmark("near_cache_key_x1k", group="helpers")
+def bench_near_cache_key(context: Context):
+    cache = NearQueryCache(grid=0.01, radius_bucket=1.0, max_ids=1000, ttl=60)
+    points = context.points[:1000]
+
+    def run():
+        for lat, lon in points:
+            cache.coverage(cache.key(lat, lon, 5.0))
+
+    return run
+
+
+@benchmark("nearest_index_k10_x100", group="helpers")
+def bench_nearest(context: Context):
+    points = context.points[:100]
+
+    def run():
+        for lat, lon in points:
+            nearest_index.nearest(lat, lon, 10)
+
+    return run
+
+
+@benchmark("suggest_x1k", group="helpers")
+def bench_suggest(context: Context):
+    rng = _rng(context)
+    prefixes = [rng.choice(["T", "Pa", "New", "Lon", "Sao", "Ru"]) for _ in range(1000)]
+
+    def run():
+        for prefix in prefixes:
+            suggest_index.suggest("city", prefix, 10)
+
+    return run
+
+
+@benchmark("ndjson_chunk_1k", group="helpers")
+def bench_ndjson_chunk(context: Context):
+    with SessionLocal() as session:
+        rows = session.execute(select(*EXPORT_COLUMNS).limit(1000)).all()
+    keys = [column.key for column in EXPORT_COLUMNS]
+    return lambda: ndjson_chunk(keys, rows)
+
+
+@benchmark("metrics_middleware_x1k", group="helpers")
+def bench_metrics_middleware(context: Context):
+    """
+    The instrumentation cost of a request, around an app doing nothing.
+    """
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    class App:
+        routes = []
+
+    middleware = MetricsMiddleware(endpoint)
+    scope = {"type": "http", "method": "GET", "path": "/", "app": App()}
+
+    async def run():
+        for _ in range(1000):
+            await middleware(dict(scope), None, send)
+
+    return run
+
+
+@benchmark("get_by_id_x100", group="crud")
+def bench_get_by_id(context: Context):
+    ids = context.ids[:100]
+    crud = CrudBase(Address)
+
+    def run():
+        with SessionLocal() as session:
+            for address_id in ids:
+                crud.get_by_id(session, address_id)
+
+    return run
+
+
+@benchmark("get_multi_first_page", group="crud")
+def bench_get_multi(context: Context):
+    crud = CrudBase(Address)
+
+    def run():
+        with SessionLocal() as session:
+            crud.get_multi(session, skip=SkipLimit(page=1, limit=100))
+
+    return run
+
+
+@benchmark("get_multi_deep_offset", group="crud", repeat=20)
+def bench_get_multi_offset(context: Context):
+    crud = CrudBase(Address)
+    page = max(1, context.rows // 200)
+
+    def run():
+        with SessionLocal() as session:
+            crud.get_multi(
+                session, skip=SkipLimit(page=page, limit=100), order_by=(Address.id,)
+            )
+
+    return run
+
+
+@benchmark("get_multi_deep_keyset", group="crud")
+def bench_get_multi_keyset(context: Context):
+    crud = CrudBase(Address)
+    after = [context.max_id // 2]
+
+    def run():
+        with SessionLocal() as session:
+            crud.get_multi(
+                session,
+                skip=SkipLimit(limit=100),
+                order_by=(Address.id,),
+                after=after,
+            )
+
+    return run
+
+
+@benchmark("get_multi_sparse_columns", group="crud")
+def bench_get_multi_sparse(context: Context):
+    crud = CrudBase(Address)
+    columns = (Address.id, Address.latitude, Address.longitude)
+
+    def run():
+        with SessionLocal() as session:
+            crud.get_multi(session, skip=SkipLimit(limit=500), columns=columns)
+
+    return run
+
+
+@benchmark("find_existing_lat_long_500", group="crud")
+def bench_find_existing(context: Context):
+    coordinates = context.points[:500]
+
+    def run():
+        with SessionLocal() as session:
+            find_existing_lat_long(session, coordinates)
+
+    return run
+
+
+@benchmark("create", group="crud", repeat=100)
+def bench_create(context: Context):
+    crud = CrudBase(Address)
+    counter = iter(range(1, 10**9))
+
+    def run():
+        index = next(counter)
+        with SessionLocal() as session:
+            crud.create(
+                session,
+                obj_to_create=AddressCreate(
+                    street=f"{index} Benchmark Road",
+                    city="Benchmark",
+                    state="Benchmark",
+                    country="Benchmark",
+                    latitude=-70 - index * 1e-7,
+                    longitude=-150 - index * 1e-7,
+                ),
+            )
+
+    return run
+
+
+@benchmark("search", group="crud")
+def bench_search(context: Context):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            await search_addresses(session, "park avenue", 20)
+
+    return run
@@ -0,0 +1,87 @@
+"""
+Per-row cost of turning a page of `Address` rows into a JSON response body.
+
+"before" is the default path: a `Response` built from ORM objects, validated
+and dumped by FastAPI against `Response[List[AddressOut]]`, then encoded with
+the standard library `json` module by `JSONResponse`. "after" is the
+`fast_responses` path: plain dicts read off the rows, encoded by orjson.
+
+Usage:
+    python -m benchmarks.serialization [--rows 500] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.helpers.serialization import address_dicts, fast_response
+from src.models.model import Address
+from src.schemas.address_schemas import AddressOut
+from src.schemas.response import Response
+
+
+def make_addresses(count: int, seed: int = 42) -> List[Address]:
+    rng = random.Random(seed)
+    return [
+        Address(
+            id=index,
+            street=f"{index} Main Street",
+            city=f"City {index % 500}",
+            state=f"State {index % 50}",
+            country=f"Country {index % 10}",
+            latitude=rng.uniform(-90, 90),
+            longitude=rng.uniform(-180, 180),
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+async def before(addresses: List[Address], field) -> bytes:
+    content = await serialize_response(
+        field=field, response_content=Response(data=addresses)
+    )
+    return JSONResponse(content).body
+
+
+async def after(addresses: List[Address], field) -> bytes:
+    return fast_response(data=address_dicts(addresses)).body
+
+
+def measure(render, addresses: List[Address], field, repeat: int) -> float:
+    """
+    Return the mean seconds spent per row.
+    """
+
+    async def run() -> float:
+        await render(addresses, field)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await render(addresses, field)
+        return time.perf_counter() - start
+
+    return asyncio.run(run()) / (repeat * len(addresses))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response", type_=Response[List[AddressOut]])
+    addresses = make_addresses(args.rows)
+
+    print(f"{'path':>8} {'us/row':>10}")
+    for label, render in (("before", before), ("after", after)):
+        per_row = measure(render, addresses, field, args.repeat)
+        print(f"{label:>8} {per_row * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Registry, runner and result comparison behind `python -m benchmarks`.
+
+A benchmark is a setup function taking the `Context` and returning the
+operation to time, a plain or an async callable. Each operation is run a few
+times to warm up, then `repeat` times under the clock.
+"""
+
+import inspect
+import json
+import math
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+@dataclass
+class Context:
+    """
+    What benchmarks may use: the seeded database size and samples of its rows,
+    plus an HTTP client bound to the ASGI app for the `http` group.
+    """
+
+    rows: int
+    seed: int
+    max_id: int
+    points: List[Tuple[float, float]]
+    ids: List[int]
+    client: Any = None
+    repeat_scale: float = 1.0
+    state: Dict[str, Any] = field(default_factory=dict)
+
+    def runs(self, repeat: int) -> int:
+        """
+        How many times an operation registered with `repeat` will be called,
+        warm-up included.
+        """
+        scaled = max(3, math.ceil(repeat * self.repeat_scale))
+        return max(1, scaled // 10) + scaled
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    setup: Callable[[Context], Union[Operation, Awaitable[Operation]]]
+    repeat: int
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str, repeat: int = 50):
+    """
+    Register the decorated setup function as benchmark `group.name`.
+    """
+
+    def register(setup):
+        full_name = f"{group}.{name}"
+        BENCHMARKS[full_name] = Benchmark(full_name, group, setup, repeat)
+        return setup
+
+    return register
+
+
+async def measure(bench: Benchmark, context: Context) -> Dict:
+    """
+    Time one benchmark and summarise its runs in milliseconds.
+    """
+    operation = bench.setup(context)
+    if inspect.isawaitable(operation):
+        operation = await operation
+    is_async = inspect.iscoroutinefunction(operation)
+    runs = context.runs(bench.repeat)
+    warmup = runs - max(3, math.ceil(bench.repeat * context.repeat_scale))
+    timings = []
+    for run in range(runs):
+        start = time.perf_counter()
+        result = operation()
+        if is_async:
+            await result
+        elapsed = time.perf_counter() - start
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "min_ms": timings[0],
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, math.ceil(len(timings) * 0.95) - 1)],
+        "mean_ms": statistics.fmean(timings),
+    }
+
+
+def environment(rows: int, seed: int) -> Dict[str, Any]:
+    """
+    Describe the run, so results are only compared when it makes sense.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "rows": rows,
+        "seed": seed,
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'benchmark':<44} {'median ms':>10} {'p95 ms':>10} {'runs':>6}")
+    for name, result in results.items():
+        print(
+            f"{name:<44} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+            f"{result['runs']:>6}"
+        )
+
+
+def write_results(path: Path, meta: Dict, results: Dict[str, Dict]) -> None:
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+
+
+def compare(
+    baseline_path: Path, current_path: Path, threshold: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Print the median time ratio of every benchmark present in both result
+    files, and return the names of those that got slower, and faster, by more
+    than `threshold`.
+    """
+    baseline = json.loads(baseline_path.read_text())
+    current = json.loads(current_path.read_text())
+    for key in ("rows", "seed"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(
+                f"warning: {key} differs ({baseline['meta'].get(key)} vs "
+                f"{current['meta'].get(key)}), the results are not comparable"
+            )
+
+    regressions, improvements = [], []
+    print(f"{'benchmark':<44} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in current["results"].items():
+        before: Optional[Dict] = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<44} {'-':>10} {result['median_ms']:>10.3f}    new")
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif ratio < 1 - threshold:
+            improvements.append(name)
+            flag = "  improved"
+        print(
+            f"{name:<44} {before['median_ms']:>10.3f} {result['median_ms']:>10.3f} "
+            f"{ratio:>6.2f}x{flag}"
+        )
+    return regressions, improvements
@@ -0,0 +1,65 @@
+import hmac
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import FileResponse
+from starlette.status import HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+
+from src.core.config import get_app_settings
+from src.core.exceptions import ForbiddenException, ObjectNotFoundException
+from src.helpers.profiling import profile_store
+from src.schemas.profile_schemas import ProfileInfo
+from src.schemas.response import Response
+
+settings = get_app_settings()
+
+
+def require_profiling_token(request: Request) -> None:
+    """
+    Require `profiling_token` in the profiling header.
+    """
+    token = request.headers.get(settings.profiling_header, "")
+    if not hmac.compare_digest(token, settings.profiling_token):
+        raise ForbiddenException(
+            message="a valid profiling token is required",
+            status_code=HTTP_403_FORBIDDEN,
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+
+@router.get(
+    "/profiles",
+    response_model=Response[List[ProfileInfo]],
+    status_code=HTTP_200_OK,
+)
+async def list_profiles():
+    """
+    Saved request profiles, most recent first.
+    """
+    profiles = []
+    for path in profile_store.list():
+        stat = path.stat()
+        profiles.append(
+            ProfileInfo(
+                name=path.name,
+                size=stat.st_size,
+                created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            )
+        )
+    return Response(data=profiles)
+
+
+@router.get("/profiles/{name}", response_class=FileResponse)
+async def download_profile(name: str):
+    """
+    Download a saved profile, readable with `pstats`, snakeviz or flameprof.
+    """
+    path = profile_store.get(name)
+    if path is None:
+        raise ObjectNotFoundException(
+            message=f"profile `{name}` not found", status_code=HTTP_404_NOT_FOUND
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -1,44 +1,162 @@
-from typing import List
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from functools import partial
+from typing import Any, Dict, List, Literal, Optional, Sequence, Union
 
-from src.core.exceptions import DuplicateException, ObjectNotFoundException
-from src.helpers.utils import find_coordinates_within_radius, is_duplicate_lat_long
+import numpy as np
+from fastapi import APIRouter, Body, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.exceptions import (
+    BadRequestException,
+    InvalidCursor,
+    ObjectNotFoundException,
+)
+from src.helpers.utils import (
+    PolygonEdges,
+    bbox_boxes,
+    boxes_contain,
+    find_coordinates_within_radius,
+    find_existing_lat_long_async,
+    haversine_matrix,
+    nearest_in_matrix,
+    rings_bounding_box,
+)
 from src.schemas.response import Response
+from src.helpers.cache import address_cache
+from src.helpers.changes import CHANGES_SORT, address_changes
+from src.helpers.export import (
+    EXPORT_COLUMNS,
+    EXPORT_MEDIA_TYPES,
+    stream_addresses,
+    stream_addresses_within,
+)
+from src.helpers.facets import FACET_LEVELS, address_total, facet_counts
+from src.helpers.near_cache import near_cache, near_candidates
+from src.helpers.search import search_addresses
+from src.helpers.serialization import address_dict, address_dicts, fast_response
+from src.helpers.suggest import suggest_index
+from src.helpers.spatial_index import nearest_index
 from src.schemas.address_schemas import (
+    AddressChange,
     AddressCreate,
+    AddressIdsSchema,
+    AddressDistanceOut,
     AddressOut,
+    AddressPatch,
+    AddressSearchOut,
+    AddressSearchSchema,
     AddressUpdate,
+    BulkCreateResult,
+    ChangesSchema,
+    DistanceMatrixOut,
+    DistanceMatrixSchema,
+    FacetCount,
+    FacetSchema,
     NearBySchema,
+    NearestIdsOut,
+    NearestSchema,
+    SparseFieldsSchema,
+    Suggestion,
+    SuggestSchema,
+    WithinSchema,
 )
 from src.models.model import Address
-from src.schemas.pagination import SkipLimit
-from src.db.session import get_db
+from src.schemas.pagination import (
+    CursorParams,
+    SkipLimit,
+    decode_cursor,
+    encode_cursor,
+    is_sqlite_int,
+)
+from src.db.session import get_async_db
 from starlette.status import (
     HTTP_201_CREATED,
+    HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_200_OK,
-    HTTP_409_CONFLICT,
 )
 
-from src.helpers.crud_base import CrudBase
+from src.helpers.crud_base import AsyncCrudBase
+from src.core.config import get_app_settings
 from src.core.dependencies import basic_security
 
+settings = get_app_settings()
+
 
 # router = APIRouter(dependencies=[Depends(basic_security)])
 router = APIRouter()
 
+DUPLICATE_LAT_LONG_MESSAGE = "address with same latitude and longitude already exist"
+
+# Keyset sort orders, each ending with the primary key to make it total.
+# SQLite secondary indexes carry the rowid, so `ix_addresses_city` serves
+# (city, id); `CrudBase.keyset_union` splits the cursor comparison so that the
+# index is seeked to the cursor itself rather than to the start of its city.
+ADDRESS_SORT_KEYS = {
+    "id": (Address.id,),
+    "city": (Address.city, Address.id),
+}
+
+
+def address_crud() -> AsyncCrudBase:
+    """
+    CRUD operations on addresses, with cached primary key lookups.
+    """
+    return AsyncCrudBase(
+        Address,
+        duplicate_message=DUPLICATE_LAT_LONG_MESSAGE,
+        cache=address_cache,
+        cache_schema=AddressOut,
+    )
+
+
+def sparse_columns(fields: Optional[Sequence[str]], *required: str) -> Optional[list]:
+    """
+    The columns to select for a sparse fieldset, plus those the route itself
+    needs, or None to load whole rows.
+    """
+    if fields is None:
+        return None
+    return [getattr(Address, name) for name in dict.fromkeys((*fields, *required))]
+
+
+def list_response(
+    fields: Optional[Sequence[str]] = None, **content: Any
+) -> Union[Response, ORJSONResponse]:
+    """
+    Wrap address dicts in the `Response` envelope. With `fast_responses` on,
+    it is encoded by orjson instead of being validated against the route's
+    `response_model` first. Sparse fieldsets always are, as they would not
+    validate against the full schema.
+    """
+    if settings.fast_responses or fields is not None:
+        return fast_response(**content)
+    return Response(**content)
+
+
 @router.get(
     "/address/near", response_model=Response[List[AddressOut]], status_code=HTTP_200_OK
 )
 async def get_nearby_addresses(
-    user_input: NearBySchema = Depends(), db: Session = Depends(get_db)
+    user_input: NearBySchema = Depends(),
+    sparse: SparseFieldsSchema = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Retrieves addresses within a given radius of a specified location.
+
+    `fields` restricts the returned fields, and the columns read, to a comma
+    separated subset such as `id,latitude,longitude`.
     """
-    crud_obj = CrudBase(Address)
-    addresses = crud_obj.get_multi(db)
+    fields = sparse.selected
+    addresses = await near_candidates(
+        db,
+        address_crud(),
+        user_input.latitude,
+        user_input.longitude,
+        user_input.radius,
+        columns=sparse_columns(fields, "id", "latitude", "longitude"),
+    )
     data = find_coordinates_within_radius(
         user_input.latitude, user_input.longitude, addresses, user_input.radius
     )
@@ -47,24 +165,352 @@ async def get_nearby_addresses(
             message="No addresses found within the specified radius",
             status_code=HTTP_404_NOT_FOUND,
         )
-    return Response(data=data)
+    return list_response(fields, data=address_dicts(data, fields))
+
+
+@router.get(
+    "/address/nearest",
+    response_model=Response[List[AddressDistanceOut]],
+    status_code=HTTP_200_OK,
+)
+async def get_nearest_addresses(
+    user_input: NearestSchema = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieves the `k` addresses closest to a specified location, ordered by
+    distance.
+    """
+    neighbours = nearest_index.nearest(
+        user_input.latitude, user_input.longitude, user_input.k
+    )
+    neighbour_ids = [address_id for address_id, _ in neighbours]
+    addresses = {
+        address.id: address
+        for address in await address_crud().get_multi(
+            db, query_filter=Address.id.in_(neighbour_ids)
+        )
+    }
+    data = [
+        {**address_dict(addresses[address_id]), "distance": distance}
+        for address_id, distance in neighbours
+        if address_id in addresses
+    ]
+    if not data:
+        raise ObjectNotFoundException(
+            message="No addresses found",
+            status_code=HTTP_404_NOT_FOUND,
+        )
+    return list_response(data=data)
+
+
+@router.post("/address/within", status_code=HTTP_200_OK)
+async def get_addresses_within(
+    user_input: WithinSchema, sparse: SparseFieldsSchema = Depends()
+) -> StreamingResponse:
+    """
+    Streams, as NDJSON, the addresses inside a GeoJSON Polygon or MultiPolygon
+    (holes excluded), or inside a `bbox` of [west, south, east, north].
+
+    Polygon edges are straight lines in longitude and latitude, so a polygon
+    crossing the antimeridian must be split at it into a MultiPolygon, as
+    RFC 7946 recommends. `fields` restricts the returned fields, and the
+    columns read, to a comma separated subset such as `id,latitude,longitude`.
+    """
+    if user_input.polygon is not None:
+        rings = user_input.polygon.rings
+        if sum(len(ring) for ring in rings) > settings.within_max_vertices:
+            raise BadRequestException(
+                message=f"polygons can have at most {settings.within_max_vertices} "
+                "positions",
+                status_code=HTTP_400_BAD_REQUEST,
+            )
+        boxes = [rings_bounding_box(rings)]
+        contains = PolygonEdges(rings).contains
+    else:
+        boxes = bbox_boxes(*user_input.bbox)
+        contains = partial(boxes_contain, boxes)
+    return StreamingResponse(
+        stream_addresses_within(
+            boxes,
+            contains,
+            columns=sparse_columns(sparse.selected) or EXPORT_COLUMNS,
+            batch_size=settings.export_batch_size,
+        ),
+        media_type=EXPORT_MEDIA_TYPES["ndjson"],
+    )
+
+
+@router.post(
+    "/address/distance-matrix",
+    response_model=Response[Union[DistanceMatrixOut, NearestIdsOut]],
+    status_code=HTTP_200_OK,
+)
+async def get_distance_matrix(
+    user_input: DistanceMatrixSchema, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Computes the great circle distances, in kilometers rounded to the meter,
+    from each of `origins` to each of the addresses `ids`.
+
+    The distances come as one row per origin over the `ids` found, flattened
+    in row-major order, or with `k`, as the ids and distances of the `k`
+    addresses closest to each origin. Ids that do not exist are listed under
+    `missing`.
+    """
+    ids = user_input.selected
+    if len(ids) > settings.batch_max_ids:
+        raise BadRequestException(
+            message=f"at most {settings.batch_max_ids} ids can be given",
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+    if len(user_input.origins) > settings.distance_matrix_max_origins:
+        raise BadRequestException(
+            message=f"at most {settings.distance_matrix_max_origins} origins "
+            "can be given",
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+    rows = await address_crud().get_by_ids(
+        db,
+        ids,
+        columns=sparse_columns(["id", "latitude", "longitude"]),
+        chunk_size=settings.bulk_chunk_size,
+    )
+    found = [address_id for address_id in ids if address_id in rows]
+    blocks = haversine_matrix(
+        [origin.latitude for origin in user_input.origins],
+        [origin.longitude for origin in user_input.origins],
+        [rows[address_id].latitude for address_id in found],
+        [rows[address_id].longitude for address_id in found],
+    )
+    # orjson encodes the numpy arrays directly.
+    if user_input.k is None:
+        distances = np.empty((len(user_input.origins), len(found)))
+        for start, block in blocks:
+            np.round(block, 3, out=distances[start : start + len(block)])
+        data = {"ids": found, "distances": distances.ravel()}
+    else:
+        indexes, nearest = nearest_in_matrix(blocks, user_input.k)
+        data = {
+            "ids": np.asarray(found, dtype=np.int64)[indexes],
+            "distances": np.round(nearest, 3),
+        }
+    return fast_response(
+        data=data, missing=[address_id for address_id in ids if address_id not in rows]
+    )
+
+
+async def get_addresses_by_ids(
+    session: AsyncSession, ids: Sequence[int], fields: Optional[Sequence[str]]
+) -> Union[Response, ORJSONResponse]:
+    """
+    The batch lookup behind `GET /addresses/?ids=`.
+    """
+    if len(ids) > settings.batch_max_ids:
+        raise BadRequestException(
+            message=f"at most {settings.batch_max_ids} ids can be fetched at once",
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+    rows = await address_crud().get_by_ids(
+        session,
+        ids,
+        columns=sparse_columns(fields, "id"),
+        chunk_size=settings.bulk_chunk_size,
+    )
+    return list_response(
+        fields,
+        data=address_dicts(
+            (rows[address_id] for address_id in ids if address_id in rows), fields
+        ),
+        missing=[address_id for address_id in ids if address_id not in rows],
+    )
 
 
 @router.get(
     "/addresses/", response_model=Response[List[AddressOut]], status_code=HTTP_200_OK
 )
 async def get_address(
-    skip: SkipLimit = Depends(), session: Session = Depends(get_db)
+    skip: SkipLimit = Depends(),
+    keyset: CursorParams = Depends(),
+    sparse: SparseFieldsSchema = Depends(),
+    batch: AddressIdsSchema = Depends(),
+    session: AsyncSession = Depends(get_async_db),
 ) -> Response:
     """
     Retrieves a list of addresses with pagination support.
+
+    Pages are addressed either by `page` or, in constant time whatever the
+    depth, by the `next_cursor` returned with the previous page. `fields`
+    restricts the returned fields, and the columns read, to a comma separated
+    subset such as `id,city`.
+
+    `ids` instead fetches the addresses with those comma separated ids, in the
+    order given, and lists the ids that do not exist under `missing`.
     """
-    return Response(
-        data=CrudBase(Address).get_multi(
-            session,
-            skip=skip,
+    fields = sparse.selected
+    if batch.ids is not None:
+        return await get_addresses_by_ids(session, batch.selected, fields)
+    order_by = ADDRESS_SORT_KEYS[keyset.sort]
+    after = None
+    if keyset.cursor:
+        try:
+            after = decode_cursor(keyset.cursor, keyset.sort, len(order_by))
+        except ValueError:
+            raise InvalidCursor(
+                message="invalid pagination cursor", status_code=HTTP_400_BAD_REQUEST
+            )
+    addresses = await address_crud().get_multi(
+        session,
+        skip=skip,
+        order_by=order_by,
+        after=after,
+        columns=sparse_columns(fields, *(column.key for column in order_by)),
+    )
+    next_cursor = None
+    if len(addresses) == skip.limit:
+        last = addresses[-1]
+        next_cursor = encode_cursor(
+            keyset.sort, [getattr(last, column.key) for column in order_by]
         )
+    return list_response(
+        fields,
+        data=address_dicts(addresses, fields),
+        next_cursor=next_cursor,
+        total=await address_total(session),
+    )
+
+
+@router.get("/addresses/export", status_code=HTTP_200_OK)
+async def export_addresses(
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream every address as NDJSON or CSV.
+    """
+    return StreamingResponse(
+        stream_addresses(format, batch_size=settings.export_batch_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="addresses.{format}"'},
+    )
+
+
+@router.get(
+    "/addresses/search",
+    response_model=Response[List[AddressSearchOut]],
+    status_code=HTTP_200_OK,
+)
+async def search_address(
+    search: AddressSearchSchema = Depends(),
+    session: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    Full text search over street, city, state and country, best matches first.
+
+    Every word must match, the last one as a prefix. Further pages are read
+    with the `next_cursor` of the previous one.
+    """
+    after = None
+    if search.cursor:
+        try:
+            after = decode_cursor(search.cursor, "rank", 2)
+        except ValueError:
+            raise InvalidCursor(
+                message="invalid pagination cursor", status_code=HTTP_400_BAD_REQUEST
+            )
+    results = await search_addresses(session, search.q, search.limit, after)
+    data = [{**address_dict(address), "rank": rank} for address, rank in results]
+    next_cursor = None
+    if len(results) == search.limit:
+        address, rank = results[-1]
+        next_cursor = encode_cursor("rank", [rank, address.id])
+    return list_response(data=data, next_cursor=next_cursor)
+
+
+@router.get(
+    "/addresses/suggest",
+    response_model=Response[List[Suggestion]],
+    status_code=HTTP_200_OK,
+)
+async def suggest_address_names(user_input: SuggestSchema = Depends()) -> Response:
+    """
+    Type-ahead suggestions of city, state or country names starting with
+    `prefix`, most used first.
+    """
+    suggestions = suggest_index.suggest(
+        user_input.field, user_input.prefix, user_input.limit
+    )
+    return Response(
+        data=[Suggestion(value=value, count=count) for value, count in suggestions]
+    )
+
+
+@router.get(
+    "/addresses/changes",
+    response_model=Response[List[AddressChange]],
+    status_code=HTTP_200_OK,
+)
+async def get_address_changes(
+    user_input: ChangesSchema = Depends(),
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Addresses created, updated or deleted since the `next_cursor` returned by
+    a previous call, oldest first; without `since`, the feed starts from the
+    beginning. Keep the last `next_cursor` and poll with it: a page shorter
+    than `limit` means the feed is caught up.
+    """
+    after = None
+    if user_input.since:
+        try:
+            at, address_id, deleted = decode_cursor(user_input.since, CHANGES_SORT)
+            if not (
+                isinstance(at, str)
+                and is_sqlite_int(address_id)
+                and isinstance(deleted, bool)
+            ):
+                raise ValueError
+        except ValueError:
+            raise BadRequestException(
+                message="invalid change feed token", status_code=HTTP_400_BAD_REQUEST
+            )
+        after = (at, address_id, deleted)
+    changes, after = await address_changes(
+        session, after, user_input.limit, settings.changes_settle_seconds
+    )
+    return list_response(
+        data=changes,
+        next_cursor=encode_cursor(CHANGES_SORT, after) if after else None,
+    )
+
+
+@router.get(
+    "/addresses/facets",
+    response_model=Response[List[FacetCount]],
+    status_code=HTTP_200_OK,
+)
+async def get_address_facets(
+    user_input: FacetSchema = Depends(),
+    session: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    Number of addresses per country, state or city, largest first, with the
+    overall total.
+    """
+    facets = await facet_counts(
+        session,
+        user_input.facet,
+        country=user_input.country,
+        state=user_input.state,
+        limit=user_input.limit,
     )
+    depth = FACET_LEVELS.index(user_input.facet) + 1
+    data = [
+        FacetCount(
+            count=facet.count,
+            **{level: getattr(facet, level) for level in FACET_LEVELS[:depth]},
+        )
+        for facet in facets
+    ]
+    return Response(data=data, total=await address_total(session))
 
 
 @router.get(
@@ -72,11 +518,11 @@ async def get_address(
     response_model=Response[AddressOut],
     status_code=HTTP_200_OK,
 )
-def get_single_address(address_id: int, db: Session = Depends(get_db)):
+async def get_single_address(address_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a single address.
     """
-    address = CrudBase(Address).get(db, query_filter=Address.id == address_id)
+    address = await address_crud().get_by_id(db, address_id)
     if address:
         return Response(data=address)
     raise ObjectNotFoundException(
@@ -88,60 +534,119 @@ def get_single_address(address_id: int, db: Session = Depends(get_db)):
 @router.post(
     "/addresses/", response_model=Response[AddressOut], status_code=HTTP_201_CREATED
 )
-def create_address(
-    address: AddressCreate, session: Session = Depends(get_db)
+async def create_address(
+    address: AddressCreate, session: AsyncSession = Depends(get_async_db)
 ) -> Response:
     """
     Create new address.
     """
-    crud_obj = CrudBase(Address)
-    if is_duplicate_lat_long(
-        crud_obj=crud_obj,
-        db=session,
-        latitude=address.latitude,
-        longitude=address.longitude,
-    ):
-        raise DuplicateException(
-            message="address with same latitude and longitude already exist",
-            status_code=HTTP_409_CONFLICT,
-        )
-    data = crud_obj.create(session=session, obj_to_create=address)
+    crud_obj = address_crud()
+    data = await crud_obj.create(session=session, obj_to_create=address)
     return Response(data=data, message="The address was created successfully")
 
 
+@router.post(
+    "/addresses/bulk",
+    response_model=Response[List[BulkCreateResult]],
+    status_code=HTTP_201_CREATED,
+)
+async def create_addresses_bulk(
+    addresses: List[AddressCreate] = Body(max_length=settings.bulk_max_items),
+    session: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    Create many addresses at once, skipping those whose latitude and longitude
+    are already taken, either in the database or earlier in the batch.
+
+    The addresses are created in one transaction, so a conflict raised while
+    inserting them, such as a concurrent create of the same coordinates,
+    creates none of them.
+    """
+    results: List[BulkCreateResult] = []
+    to_create = {}
+    for index, address in enumerate(addresses):
+        coordinates = (address.latitude, address.longitude)
+        if coordinates in to_create:
+            results.append(
+                BulkCreateResult(
+                    index=index,
+                    status="conflict",
+                    message="same latitude and longitude as item "
+                    f"{to_create[coordinates]}",
+                )
+            )
+        else:
+            to_create[coordinates] = index
+
+    existing = await find_existing_lat_long_async(session, to_create)
+    for coordinates in existing:
+        results.append(
+            BulkCreateResult(
+                index=to_create.pop(coordinates),
+                status="conflict",
+                message=DUPLICATE_LAT_LONG_MESSAGE,
+            )
+        )
+
+    indexes = list(to_create.values())
+    rows = await address_crud().create_multi(
+        session,
+        objs_to_create=[addresses[index].model_dump() for index in indexes],
+        chunk_size=settings.bulk_chunk_size,
+    )
+    results.extend(
+        BulkCreateResult(index=index, status="created", id=row["id"])
+        for index, row in zip(indexes, rows)
+    )
+    results.sort(key=lambda result: result.index)
+    created = sum(result.status == "created" for result in results)
+    return Response(
+        data=results, message=f"{created} of {len(addresses)} addresses were created"
+    )
+
+
 @router.put(
     "/addresses/{address_id}",
     response_model=Response[AddressOut],
     status_code=HTTP_200_OK,
 )
-def update_existing_address(
-    address_id: int, updates: AddressUpdate, db: Session = Depends(get_db)
+async def update_existing_address(
+    address_id: int, updates: AddressUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing address with the provided updates.
     """
-    crud_obj = CrudBase(Address)
-    address = crud_obj.get(db, query_filter=Address.id == address_id)
-    if not address:
+    address = await address_crud().update(
+        session=db, id_to_update=address_id, updated_obj=updates
+    )
+    if address is None:
         raise ObjectNotFoundException(
             message=f"address with id `{address_id}` not found",
             status_code=HTTP_404_NOT_FOUND,
         )
-    if is_duplicate_lat_long(
-        crud_obj=crud_obj,
-        db=db,
-        latitude=updates.latitude,
-        longitude=updates.longitude,
-        instance_id=address.id,
-    ):
-        raise DuplicateException(
-            message="address with same latitude and longitude already exist",
-            status_code=HTTP_409_CONFLICT,
-        )
-    updated_address = crud_obj.update(
-        session=db, updated_obj=updates, db_obj_to_update=address
+    return Response(data=address, message="address updated successfully")
+
+
+@router.patch(
+    "/addresses/{address_id}",
+    response_model=Response[AddressOut],
+    status_code=HTTP_200_OK,
+)
+async def patch_existing_address(
+    address_id: int, updates: AddressPatch, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update only the provided fields of an existing address.
+    """
+    address = await address_crud().update(
+        session=db, id_to_update=address_id, updated_obj=updates, partial=True
     )
-    return Response(data=updated_address, message="address updated successfully")
+    if address is None:
+        raise ObjectNotFoundException(
+            message=f"address with id `{address_id}` not found",
+            status_code=HTTP_404_NOT_FOUND,
+        )
+    return Response(data=address, message="address updated successfully")
 
 
 @router.delete(
@@ -149,16 +654,30 @@ def update_existing_address(
     response_model=Response[AddressOut],
     status_code=HTTP_200_OK,
 )
-def delete_existing_address(address_id: int, db: Session = Depends(get_db)):
+async def delete_existing_address(
+    address_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """
-    Delete an address.
+    Delete an address, returning it as it was.
     """
-    crud_obj = CrudBase(Address)
-    address_obj = crud_obj.get(session=db, query_filter=Address.id == address_id)
-    if address_obj:
-        CrudBase(Address).delete(session=db, id_to_delete=address_id)
-        return Response(message="Address deleted successfully")
-    raise ObjectNotFoundException(
-        message=f"address with id `{address_id}` not found",
-        status_code=HTTP_404_NOT_FOUND,
+    address = await address_crud().delete(session=db, id_to_delete=address_id)
+    if address is None:
+        raise ObjectNotFoundException(
+            message=f"address with id `{address_id}` not found",
+            status_code=HTTP_404_NOT_FOUND,
+        )
+    return Response(data=address, message="Address deleted successfully")
+
+
+@router.get(
+    "/address/cache-stats",
+    response_model=Response[Dict[str, Dict[str, Any]]],
+    status_code=HTTP_200_OK,
+)
+async def get_cache_stats():
+    """
+    Hit rates and sizes of the address lookup and near-query caches.
+    """
+    return Response(
+        data={"addresses": address_cache.stats(), "near": near_cache.stats()}
     )
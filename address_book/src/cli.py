@@ -0,0 +1,103 @@
+"""
+Command line entry points, run from the `address_book` directory:
+
+    python -m src.cli import-addresses addresses.csv [--chunk-size 5000]
+    python -m src.cli import-addresses addresses.ndjson --resume 3
+    python -m src.cli rebuild-facets
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from src.core.config import get_app_settings
+from src.db.session import SessionLocal
+from src.helpers.facets import rebuild_facets
+from src.helpers.importer import IMPORT_FORMATS, AddressImporter, iter_records
+from src.models.model import AddressImport
+
+
+def print_progress(job: AddressImport) -> None:
+    print(
+        f"import {job.id}: {job.rows_read} read, {job.rows_created} created, "
+        f"{job.rows_rejected} rejected",
+        flush=True,
+    )
+
+
+def import_addresses(args: argparse.Namespace) -> int:
+    """
+    Import addresses from a CSV or NDJSON file.
+    """
+    path = Path(args.path)
+    import_format = args.format or ("csv" if path.suffix == ".csv" else "ndjson")
+    options = {"chunk_size": args.chunk_size, "on_progress": print_progress}
+    with SessionLocal() as session, path.open(newline="", encoding="utf-8") as lines:
+        if args.resume:
+            try:
+                importer = AddressImporter.resume(session, args.resume, **options)
+            except ValueError as exc:
+                print(f"cannot resume: {exc}", file=sys.stderr)
+                return 1
+        else:
+            importer = AddressImporter.start(
+                session, str(path), import_format, **options
+            )
+        print(f"import {importer.job.id}: started from record {importer.job.rows_read}")
+        try:
+            job = importer.run(iter_records(lines, importer.job.format))
+        except Exception:
+            print(
+                f"import {importer.job.id} failed, resume it with --resume "
+                f"{importer.job.id}",
+                file=sys.stderr,
+            )
+            raise
+    print_progress(job)
+    print(json.dumps(job.rejections, indent=2))
+    return 0
+
+
+def rebuild_address_facets(args: argparse.Namespace) -> int:
+    """
+    Recompute the address facet counts from the addresses table.
+    """
+    with SessionLocal() as session:
+        total = rebuild_facets(session)
+    print(f"facets rebuilt: {total} addresses")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser(
+        "import-addresses",
+        help="import addresses from a CSV or NDJSON file",
+        description="Import addresses from a CSV or NDJSON file. A running "
+        "server rebuilds its nearest, suggest and near query indexes within "
+        "INDEX_REFRESH_SECONDS of the import ending; restart it if that is "
+        "disabled.",
+    )
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=IMPORT_FORMATS)
+    importer.add_argument(
+        "--chunk-size", type=int, default=get_app_settings().bulk_chunk_size
+    )
+    importer.add_argument("--resume", type=int, metavar="IMPORT_ID")
+    importer.set_defaults(handler=import_addresses)
+
+    facets = commands.add_parser(
+        "rebuild-facets", help="recompute the address facet counts"
+    )
+    facets.set_defaults(handler=rebuild_address_facets)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
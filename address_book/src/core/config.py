@@ -5,7 +5,8 @@ import os
 from src.core.settings.app import AppSettings
 from pathlib import Path
 
-DATABASE_URI = "sqlite:///./sql_app.db"
+DATABASE_URI = os.getenv("DATABASE_URI", "sqlite:///./sql_app.db")
+ASYNC_DATABASE_URI = DATABASE_URI.replace("sqlite://", "sqlite+aiosqlite://", 1)
 BASE_DIR = Path(__file__).parent.parent.parent.resolve()
 
 
@@ -14,7 +15,11 @@ def get_app_settings() -> AppSettings:
     """
     Return application config.
     """
-    return AppSettings(database_url=DATABASE_URI, base_dir=BASE_DIR)
+    return AppSettings(
+        database_url=DATABASE_URI,
+        async_database_url=ASYNC_DATABASE_URI,
+        base_dir=BASE_DIR,
+    )
 
 
 def configure_logging(logger_level=logging.INFO):
@@ -51,6 +51,24 @@ class DuplicateException(BaseInternalException):
     """
 
 
+class BadRequestException(BaseInternalException):
+    """
+    Exception raised when a request parameter cannot be interpreted.
+    """
+
+
+class InvalidCursor(BadRequestException):
+    """
+    Exception raised when a pagination cursor was not issued for the query.
+    """
+
+
+class ForbiddenException(BaseInternalException):
+    """
+    Exception raised when a request lacks the credentials an endpoint requires.
+    """
+
+
 def add_internal_exception_handler(app: FastAPI) -> None:
     """
     Handle all internal exceptions.
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Optional
 
 from src.core.settings.base import BaseAppSettings
 
@@ -25,8 +25,46 @@ class AppSettings(BaseAppSettings):
     allowed_hosts: List[str] = ["*"]
 
     database_url: str
+    async_database_url: str
     min_connection_count: int = 5
     max_connection_count: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = True
+    db_echo: bool = False
+    sqlite_profile: Literal["default", "performance"] = "performance"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024
+    sqlite_busy_timeout: int = 5000
+    bulk_chunk_size: int = 1000
+    bulk_max_items: int = 10_000
+    batch_max_ids: int = 1000
+    changes_settle_seconds: int = 1
+    export_batch_size: int = 1000
+    within_max_vertices: int = 100_000
+    distance_matrix_max_origins: int = 1000
+    fast_responses: bool = False
+
+    cache_backend: Literal["memory", "redis"] = "memory"
+    cache_max_size: int = 10000
+    cache_ttl: float = 60.0
+    redis_url: str = "redis://localhost:6379/0"
+
+    near_cache_enabled: bool = True
+    near_cache_grid: float = 0.01
+    near_cache_radius_bucket: float = 1.0
+    near_cache_max_ids: int = 1_000_000
+    index_refresh_seconds: float = 5.0
+
+    metrics_enabled: bool = True
+    slow_request_threshold: float = 1.0
+    slow_request_max_statements: int = 20
+
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "profiles"
+    profiling_keep: int = 50
     base_dir: Path
 
     class Config:
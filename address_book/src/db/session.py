@@ -1,14 +1,99 @@
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator, List
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.core.config import get_app_settings
+from src.core.settings.app import AppSettings
+from src.helpers.metrics import instrument_engine
 
 settings = get_app_settings()
 
-engine = create_engine(url=settings.database_url, echo=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def sqlite_pragmas(settings: AppSettings) -> List[str]:
+    """
+    Pragmas run on every new SQLite connection for the configured profile.
+    """
+    if settings.sqlite_profile != "performance":
+        return []
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+    ]
+
+
+def engine_kwargs(url: str, settings: AppSettings) -> Dict[str, Any]:
+    """
+    Pool and logging options for `create_engine` and `create_async_engine`.
+
+    In-memory SQLite databases live and die with their single connection, so
+    they keep SQLAlchemy's default pool.
+    """
+    kwargs: Dict[str, Any] = {"echo": settings.db_echo}
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite" and database_url.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        return kwargs
+    if database_url.get_dialect().is_async:
+        # aiosqlite defaults to opening a connection per checkout.
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    return {
+        **kwargs,
+        "pool_size": settings.min_connection_count,
+        "max_overflow": max(
+            0, settings.max_connection_count - settings.min_connection_count
+        ),
+        "pool_timeout": settings.pool_timeout,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def apply_sqlite_profile(engine: Engine, settings: AppSettings) -> None:
+    """
+    Run the profile's pragmas whenever `engine` opens a SQLite connection.
+    """
+    pragmas = sqlite_pragmas(settings)
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+engine = create_engine(
+    url=settings.database_url,
+    future=True,
+    **engine_kwargs(settings.database_url, settings),
+)
+apply_sqlite_profile(engine, settings)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+async_engine = create_async_engine(
+    url=settings.async_database_url,
+    **engine_kwargs(settings.async_database_url, settings),
+)
+apply_sqlite_profile(async_engine.sync_engine, settings)
+if settings.metrics_enabled:
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 def get_db() -> Generator:
@@ -20,3 +105,11 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async generator dependency yield database connection.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
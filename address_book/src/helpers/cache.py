@@ -0,0 +1,192 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import orjson
+
+from src.core.config import get_app_settings
+from src.core.settings.app import AppSettings
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the key/value caches sitting in front of the database.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter bumped by every `delete` and `clear`. Read it before loading a
+        value from the database and pass it to `set`, so a value read before a
+        concurrent invalidation is not stored.
+        """
+        return self._generation
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value, or `None` on a miss.
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Cache `value` under `key`, unless `generation` is given and the cache
+        was invalidated since.
+        """
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """
+        Drop `key` from the cache.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Drop every key from the cache.
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters of this process.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LRUTTLCache(CacheBackend):
+    """
+    In-process cache bounded by entry count (least recently used entries are
+    evicted first) and by entry age.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared by every worker, stored in Redis or any server speaking its
+    protocol. `client` only needs redis-py's `get`, `set(ex=...)`, `delete`
+    and `scan_iter`.
+
+    Values are stored as JSON, so they must be plain JSON-compatible data such
+    as the dicts the API returns. The `generation` guard only covers the
+    invalidations made by this process; writes from other workers are bounded
+    by the TTL.
+    """
+
+    def __init__(self, client: Any, namespace: str, ttl: float) -> None:
+        super().__init__()
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        payload = self.client.get(self._key(key))
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(payload)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        payload = orjson.dumps(value)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self.client.set(self._key(key), payload, ex=max(1, int(self.ttl)))
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self.client.delete(self._key(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+        for key in self.client.scan_iter(match=f"{self.namespace}:*"):
+            self.client.delete(key)
+
+
+def create_cache(settings: AppSettings, namespace: str) -> CacheBackend:
+    """
+    Build the cache backend selected by the settings.
+    """
+    if settings.cache_backend == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "the `redis` package is required for `cache_backend=redis`"
+            ) from exc
+        return RedisCache(
+            redis.Redis.from_url(settings.redis_url),
+            namespace=namespace,
+            ttl=settings.cache_ttl,
+        )
+    return LRUTTLCache(max_size=settings.cache_max_size, ttl=settings.cache_ttl)
+
+
+address_cache = create_cache(get_app_settings(), namespace="addresses")
@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, func, literal, literal_column, null, select
+from sqlalchemy import tuple_, type_coerce, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.helpers.serialization import ADDRESS_FIELDS
+from src.models.model import Address, AddressTombstone
+
+CHANGES_SORT = "changes"
+
+# The position of a change in the feed: its timestamp as stored, the address
+# id and whether it is a delete.
+Watermark = Tuple[str, int, bool]
+
+DATA_FIELDS = tuple(field for field in ADDRESS_FIELDS if field != "id")
+
+
+def _branch(
+    stamp, id_column, deleted: bool, after: Optional[Watermark], cutoff, limit: int
+):
+    """
+    One side of the feed, read in index order from `after` up to `cutoff`.
+    """
+    if deleted:
+        data = [null().label(field) for field in DATA_FIELDS]
+    else:
+        data = [getattr(Address, field) for field in DATA_FIELDS]
+    query = select(
+        type_coerce(stamp, String).label("changed_at"),
+        id_column.label("id"),
+        literal(int(deleted)).label("deleted"),
+        *data,
+    ).where(stamp <= cutoff)
+    if after is not None:
+        at, after_id, after_deleted = after
+        position = tuple_(stamp, id_column)
+        watermark = tuple_(literal(at, String), literal(after_id))
+        # An upsert sorts before a delete of the same address in the same second.
+        if deleted and not after_deleted:
+            query = query.where(position >= watermark)
+        else:
+            query = query.where(position > watermark)
+    return query.order_by(stamp, id_column).limit(limit).subquery()
+
+
+def changes_query(after: Optional[Watermark], limit: int, settle_seconds: int):
+    """
+    The next `limit` creates, updates and deletes after `after`, oldest first,
+    merged from the `(updated_at, id)` index of `addresses` and the
+    `(deleted_at, id)` index of `address_tombstones`.
+
+    Timestamps have a resolution of one second, so changes are only served
+    once `settle_seconds` have passed: a later write could otherwise land in
+    the same second with a smaller id, behind a client's watermark. This
+    assumes every write commits within `settle_seconds` of its timestamp,
+    which is taken when its statement runs, not when it commits; a
+    transaction held open longer can still land behind a watermark.
+
+    Address ids are never reused, so an address's delete always comes after
+    its upserts and a tombstone never hides a later address.
+    """
+    cutoff = func.datetime("now", f"-{settle_seconds} seconds")
+    upserts = _branch(Address.updated_at, Address.id, False, after, cutoff, limit)
+    deletes = _branch(
+        AddressTombstone.deleted_at, AddressTombstone.id, True, after, cutoff, limit
+    )
+    return (
+        union_all(select(upserts), select(deletes))
+        .order_by(
+            literal_column("changed_at"),
+            literal_column("id"),
+            literal_column("deleted"),
+        )
+        .limit(limit)
+    )
+
+
+async def address_changes(
+    session: AsyncSession,
+    after: Optional[Watermark],
+    limit: int,
+    settle_seconds: int,
+) -> Tuple[List[Dict[str, Any]], Optional[Watermark]]:
+    """
+    A page of the change feed, and the watermark to resume from after it.
+    """
+    result = await session.execute(changes_query(after, limit, settle_seconds))
+    changes = []
+    for row in result:
+        change = row._asdict()
+        after = (change["changed_at"], change["id"], bool(change["deleted"]))
+        change["changed_at"] = datetime.fromisoformat(change["changed_at"])
+        change["deleted"] = bool(change["deleted"])
+        changes.append(change)
+    return changes, after
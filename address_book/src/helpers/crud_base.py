@@ -1,8 +1,26 @@
-from typing import Optional, Type, TypeVar, Union, Any
+from collections import defaultdict
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+    Any,
+    Iterator,
+)
 
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, inspect, insert, select, delete, union_all, update
+from starlette.status import HTTP_409_CONFLICT
 
+from src.core.exceptions import DuplicateException
+from src.helpers.cache import CacheBackend
+from src.helpers.utils import chunked
 from src.db.base_class import Base
 
 from pydantic import BaseModel
@@ -13,20 +31,209 @@ ModelType = TypeVar("ModelType", bound=Base)
 InDBSchemaType = TypeVar("InDBSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Called with the operation (`create`, `update` or `delete`) and the affected
+# row as a dict, once the change has been committed.
+WriteListener = Callable[[str, Dict[str, Any]], None]
+
+_write_listeners: Dict[type, List[WriteListener]] = defaultdict(list)
+
+
+def register_write_listener(
+    table_model: Type[ModelType], listener: WriteListener
+) -> None:
+    """
+    Subscribe `listener` to committed writes made through `CrudBase` on
+    `table_model`.
+    """
+    _write_listeners[table_model].append(listener)
+
+
+def as_dict(db_obj: ModelType) -> Dict[str, Any]:
+    """
+    Column values of an ORM object.
+    """
+    return {c.key: getattr(db_obj, c.key) for c in inspect(db_obj).mapper.column_attrs}
+
 
 class CrudBase:
     """
     Generic CRUD operations for SQLAlchemy models.
     """
 
-    def __init__(self, table_model: Type[ModelType]) -> None:
+    def __init__(
+        self,
+        table_model: Type[ModelType],
+        duplicate_message: str = "object already exist",
+        cache: Optional[CacheBackend] = None,
+        cache_schema: Optional[Type[BaseModel]] = None,
+    ) -> None:
         """
         Initializes the CrudBase with the SQLAlchemy model to operate on.
 
         Args:
             table_model (Type[ModelType]): SQLAlchemy model to perform CRUD operations on.
+            duplicate_message (str): Message of the `DuplicateException` raised
+                when a write violates a unique constraint.
+            cache (CacheBackend): Optional read-through cache of primary key
+                lookups, invalidated by the writes made through this class.
+            cache_schema (Type[BaseModel]): Schema whose JSON-compatible dump is
+                cached instead of every column of the record.
         """
         self.table_model = table_model
+        self.duplicate_message = duplicate_message
+        self.cache = cache
+        self.cache_schema = cache_schema
+
+    def raise_for_integrity_error(self, exc: IntegrityError) -> None:
+        """
+        Map unique constraint violations to `DuplicateException` and re-raise
+        any other integrity error.
+        """
+        if "unique" in str(exc.orig).lower():
+            raise DuplicateException(
+                message=self.duplicate_message, status_code=HTTP_409_CONFLICT
+            ) from exc
+        raise exc
+
+    def insert_query(self, data: Dict[str, Any]):
+        """
+        Build the single-statement INSERT ... RETURNING behind `create`.
+        """
+        return insert(self.table_model).values(**data).returning(self.table_model)
+
+    def update_query(self, id_to_update: Any, data: Dict[str, Any]):
+        """
+        Build the single-statement UPDATE ... RETURNING behind `update`.
+        """
+        return (
+            update(self.table_model)
+            .where(self.table_model.id == id_to_update)
+            .values(**data)
+            .returning(self.table_model)
+            .execution_options(populate_existing=True)
+        )
+
+    def delete_query(self, id_to_delete: Any):
+        """
+        Build the single-statement DELETE ... RETURNING behind `delete`.
+        """
+        return (
+            delete(self.table_model)
+            .where(self.table_model.id == id_to_delete)
+            .returning(self.table_model)
+        )
+
+    def notify(self, operation: str, row: Dict[str, Any]) -> None:
+        """
+        Forward a committed write to the cache and the listeners of the table
+        model.
+        """
+        if self.cache is not None and operation != "create":
+            self.cache.delete(row["id"])
+        for listener in _write_listeners.get(self.table_model, ()):
+            listener(operation, row)
+
+    def multi_query(
+        self,
+        query_filter=None,
+        skip: Optional[SkipLimit] = None,
+        order_by: Sequence = (),
+        after: Optional[Sequence] = None,
+        columns: Optional[Sequence] = None,
+    ):
+        """
+        Build the SELECT behind `get_multi`.
+        """
+        query = select(*columns) if columns else select(self.table_model)
+        if query_filter is not None:
+            query = query.filter(query_filter)
+        if after is not None and len(order_by) > 1:
+            return self.keyset_union(query, skip, order_by, after, columns)
+        if after is not None:
+            query = query.filter(order_by[0] > after[0])
+        if order_by:
+            query = query.order_by(*order_by)
+        if skip:
+            if after is None:
+                query = query.offset((skip.page - 1) * skip.limit)
+            query = query.limit(skip.limit)
+        return query
+
+    def keyset_union(
+        self,
+        query,
+        skip: Optional[SkipLimit],
+        order_by: Sequence,
+        after: Sequence,
+        columns: Optional[Sequence] = None,
+    ):
+        """
+        Build the page after `after` on a composite sort key as a UNION ALL of
+        disjoint ranges, `a = x AND b > y` then `a > x`, each of which SQLite
+        seeks on the index. The row value `(a, b) > (x, y)` is only seeked on
+        `a >= x`, scanning every row that shares the cursor's leading value.
+        """
+        limit = skip.limit if skip else None
+        arms = []
+        for depth in reversed(range(len(order_by))):
+            equal = [column == value for column, value in zip(order_by, after[:depth])]
+            arm = (
+                query.filter(*equal, order_by[depth] > after[depth])
+                .order_by(*order_by)
+                .limit(limit)
+                .subquery()
+            )
+            arms.append(select(arm))
+        pages = union_all(*arms).subquery()
+        if columns:
+            page = select(*(pages.c[column.key] for column in columns))
+        else:
+            page = select(aliased(self.table_model, pages))
+        sort_key = [pages.c[column.key] for column in order_by]
+        return page.order_by(*sort_key).limit(limit)
+
+    def ids_queries(
+        self,
+        ids: Sequence[Any],
+        columns: Optional[Sequence] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator:
+        """
+        Build the SELECTs behind `get_by_ids`, one `IN` per chunk of ids.
+        """
+        query = select(*(columns or self.table_model.__table__.columns))
+        for start in range(0, len(ids), chunk_size):
+            yield query.where(self.table_model.id.in_(ids[start : start + chunk_size]))
+
+    def from_cache(self, id_to_get: Any) -> Optional[ModelType]:
+        """
+        Return a detached copy of a cached record, if any.
+        """
+        if self.cache is None:
+            return None
+        row = self.cache.get(id_to_get)
+        return self.table_model(**row) if row is not None else None
+
+    def cache_generation(self) -> Optional[int]:
+        """
+        Generation of the cache, to read before loading a record to cache.
+        """
+        return self.cache.generation if self.cache is not None else None
+
+    def to_cache(
+        self, db_obj: Optional[ModelType], generation: Optional[int] = None
+    ) -> None:
+        """
+        Store a record fetched from the database in the cache, if any, unless
+        the cache was invalidated since `generation` was read.
+        """
+        if self.cache is None or db_obj is None:
+            return
+        if self.cache_schema is not None:
+            row = self.cache_schema.model_validate(db_obj).model_dump(mode="json")
+        else:
+            row = as_dict(db_obj)
+        self.cache.set(db_obj.id, row, generation)
 
     def get(self, session: Session, query_filter=None) -> Union[Optional[ModelType]]:
         """
@@ -38,60 +245,308 @@ class CrudBase:
         result = session.execute(query)
         return result.scalars().first()
 
+    def get_by_id(self, session: Session, id_to_get: Any) -> Optional[ModelType]:
+        """
+        Retrieves a single record by primary key, through the cache if any.
+        """
+        db_obj = self.from_cache(id_to_get)
+        if db_obj is None:
+            generation = self.cache_generation()
+            db_obj = self.get(session, query_filter=self.table_model.id == id_to_get)
+            self.to_cache(db_obj, generation)
+        return db_obj
+
     def get_multi(
         self,
         session: Session,
         query_filter=None,
         skip: Optional[SkipLimit] = None,
-    ) -> list[ModelType]:
+        order_by: Sequence = (),
+        after: Optional[Sequence] = None,
+        columns: Optional[Sequence] = None,
+    ) -> list:
         """
         Retrieves multiple records from the database based on the provided filter
         and pagination parameters.
-        """
-        query = select(self.table_model)
-        if query_filter is not None:
-            query = query.filter(query_filter)
-        if skip:
-            query = query.offset((skip.page - 1) * skip.limit).limit(skip.limit)
 
+        Passing `after` switches from offset to keyset pagination: only the rows
+        sorting strictly after those `order_by` values are read, so the cost of
+        a page does not grow with its depth.
+
+        Passing `columns` selects only those columns, returned as plain rows
+        with attribute access instead of ORM objects.
+        """
+        query = self.multi_query(query_filter, skip, order_by, after, columns)
         result = session.execute(query)
-        return result.scalars().all()
+        return result.all() if columns else result.scalars().all()
+
+    def get_by_ids(
+        self,
+        session: Session,
+        ids: Sequence[Any],
+        columns: Optional[Sequence] = None,
+        chunk_size: int = 1000,
+    ) -> Dict[Any, Any]:
+        """
+        Retrieves the records with the given primary keys, mapped by id, as
+        plain rows rather than ORM objects.
+
+        Passing `columns` selects only those columns, which must include `id`.
+        """
+        rows = {}
+        for query in self.ids_queries(ids, columns, chunk_size):
+            for row in session.execute(query):
+                rows[row.id] = row
+        return rows
 
     def create(self, session: Session, *, obj_to_create: InDBSchemaType) -> ModelType:
         """
         Creates a new record in the database.
         """
-
-        db_obj: ModelType = self.table_model(**obj_to_create.model_dump())
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
+        try:
+            db_obj: ModelType = session.scalars(
+                self.insert_query(obj_to_create.model_dump())
+            ).one()
+            session.commit()
+        except IntegrityError as exc:
+            session.rollback()
+            self.raise_for_integrity_error(exc)
+        self.notify("create", as_dict(db_obj))
         return db_obj
 
+    def insert_many_query(self):
+        """
+        Build the executemany INSERT behind `create_multi`, returning every
+        inserted row in the order of its parameters.
+        """
+        table = self.table_model.__table__
+        return insert(table).returning(*table.columns, sort_by_parameter_order=True)
+
+    def create_multi(
+        self,
+        session: Session,
+        *,
+        objs_to_create: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Creates many records in one transaction, without loading ORM objects.
+
+        With `chunk_size`, they are inserted that many at a time, still in one
+        transaction: either every record is created or none is.
+        """
+        if not objs_to_create:
+            return []
+        rows = []
+        try:
+            for chunk in chunked(objs_to_create, chunk_size or len(objs_to_create)):
+                result = session.execute(self.insert_many_query(), chunk)
+                rows.extend(dict(row) for row in result.mappings())
+            session.commit()
+        except IntegrityError as exc:
+            session.rollback()
+            self.raise_for_integrity_error(exc)
+        for row in rows:
+            self.notify("create", row)
+        return rows
+
     def update(
         self,
         session: Session,
+        id_to_update: Any,
         updated_obj: UpdateSchemaType,
-        db_obj_to_update: ModelType,
+        partial: bool = False,
     ) -> Optional[ModelType]:
         """
-        Updates an existing record in the database.
+        Updates a record in one UPDATE ... RETURNING statement and returns it,
+        or `None` when no record has that id.
+
+        With `partial`, only the fields set on `updated_obj` are written.
         """
-        if db_obj_to_update:
-            existing_obj_to_update_data = db_obj_to_update.__dict__
-            updated_data: dict[str, Any] = updated_obj.model_dump()
-            for field in existing_obj_to_update_data:
-                if field in updated_data:
-                    setattr(db_obj_to_update, field, updated_data[field])
-            session.add(db_obj_to_update)
+        updated_data: Dict[str, Any] = updated_obj.model_dump(exclude_unset=partial)
+        if not updated_data:
+            return self.get_by_id(session, id_to_update)
+        try:
+            db_obj = session.scalars(
+                self.update_query(id_to_update, updated_data)
+            ).one_or_none()
             session.commit()
-            session.refresh(db_obj_to_update)
-        return db_obj_to_update
+        except IntegrityError as exc:
+            session.rollback()
+            self.raise_for_integrity_error(exc)
+        if db_obj is not None:
+            self.notify("update", as_dict(db_obj))
+        return db_obj
 
-    def delete(self, session: Session, id_to_delete: int) -> None:
+    def delete(self, session: Session, id_to_delete: Any) -> Optional[ModelType]:
         """
-        Deletes a record from the database.
+        Deletes a record in one DELETE ... RETURNING statement and returns it,
+        or `None` when no record has that id.
         """
-        query = delete(self.table_model).where(self.table_model.id == id_to_delete)
-        session.execute(query)
+        db_obj = session.scalars(self.delete_query(id_to_delete)).one_or_none()
         session.commit()
+        if db_obj is not None:
+            self.notify("delete", as_dict(db_obj))
+        return db_obj
+
+
+class AsyncCrudBase(CrudBase):
+    """
+    Generic CRUD operations for SQLAlchemy models over an `AsyncSession`.
+    """
+
+    async def get(
+        self, session: AsyncSession, query_filter=None
+    ) -> Union[Optional[ModelType]]:
+        """
+        Retrieves a single record from the database based on the provided filter.
+        """
+        query = select(self.table_model)
+        if query_filter is not None:
+            query = query.filter(query_filter)
+        result = await session.execute(query)
+        return result.scalars().first()
+
+    async def get_by_id(
+        self, session: AsyncSession, id_to_get: Any
+    ) -> Optional[ModelType]:
+        """
+        Retrieves a single record by primary key, through the cache if any.
+        """
+        db_obj = self.from_cache(id_to_get)
+        if db_obj is None:
+            generation = self.cache_generation()
+            db_obj = await self.get(
+                session, query_filter=self.table_model.id == id_to_get
+            )
+            self.to_cache(db_obj, generation)
+        return db_obj
+
+    async def get_multi(
+        self,
+        session: AsyncSession,
+        query_filter=None,
+        skip: Optional[SkipLimit] = None,
+        order_by: Sequence = (),
+        after: Optional[Sequence] = None,
+        columns: Optional[Sequence] = None,
+    ) -> list:
+        """
+        Retrieves multiple records from the database based on the provided filter
+        and pagination parameters.
+
+        Passing `after` switches from offset to keyset pagination: only the rows
+        sorting strictly after those `order_by` values are read, so the cost of
+        a page does not grow with its depth.
+
+        Passing `columns` selects only those columns, returned as plain rows
+        with attribute access instead of ORM objects.
+        """
+        query = self.multi_query(query_filter, skip, order_by, after, columns)
+        result = await session.execute(query)
+        return result.all() if columns else result.scalars().all()
+
+    async def get_by_ids(
+        self,
+        session: AsyncSession,
+        ids: Sequence[Any],
+        columns: Optional[Sequence] = None,
+        chunk_size: int = 1000,
+    ) -> Dict[Any, Any]:
+        """
+        Retrieves the records with the given primary keys, mapped by id, as
+        plain rows rather than ORM objects.
+
+        Passing `columns` selects only those columns, which must include `id`.
+        """
+        rows = {}
+        for query in self.ids_queries(ids, columns, chunk_size):
+            for row in await session.execute(query):
+                rows[row.id] = row
+        return rows
+
+    async def create(
+        self, session: AsyncSession, *, obj_to_create: InDBSchemaType
+    ) -> ModelType:
+        """
+        Creates a new record in the database.
+        """
+        try:
+            db_obj: ModelType = (
+                await session.scalars(self.insert_query(obj_to_create.model_dump()))
+            ).one()
+            await session.commit()
+        except IntegrityError as exc:
+            await session.rollback()
+            self.raise_for_integrity_error(exc)
+        self.notify("create", as_dict(db_obj))
+        return db_obj
+
+    async def create_multi(
+        self,
+        session: AsyncSession,
+        *,
+        objs_to_create: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Creates many records in one transaction, without loading ORM objects.
+
+        With `chunk_size`, they are inserted that many at a time, still in one
+        transaction: either every record is created or none is.
+        """
+        if not objs_to_create:
+            return []
+        rows = []
+        try:
+            for chunk in chunked(objs_to_create, chunk_size or len(objs_to_create)):
+                result = await session.execute(self.insert_many_query(), chunk)
+                rows.extend(dict(row) for row in result.mappings())
+            await session.commit()
+        except IntegrityError as exc:
+            await session.rollback()
+            self.raise_for_integrity_error(exc)
+        for row in rows:
+            self.notify("create", row)
+        return rows
+
+    async def update(
+        self,
+        session: AsyncSession,
+        id_to_update: Any,
+        updated_obj: UpdateSchemaType,
+        partial: bool = False,
+    ) -> Optional[ModelType]:
+        """
+        Updates a record in one UPDATE ... RETURNING statement and returns it,
+        or `None` when no record has that id.
+
+        With `partial`, only the fields set on `updated_obj` are written.
+        """
+        updated_data: Dict[str, Any] = updated_obj.model_dump(exclude_unset=partial)
+        if not updated_data:
+            return await self.get_by_id(session, id_to_update)
+        try:
+            db_obj = (
+                await session.scalars(self.update_query(id_to_update, updated_data))
+            ).one_or_none()
+            await session.commit()
+        except IntegrityError as exc:
+            await session.rollback()
+            self.raise_for_integrity_error(exc)
+        if db_obj is not None:
+            self.notify("update", as_dict(db_obj))
+        return db_obj
+
+    async def delete(
+        self, session: AsyncSession, id_to_delete: Any
+    ) -> Optional[ModelType]:
+        """
+        Deletes a record in one DELETE ... RETURNING statement and returns it,
+        or `None` when no record has that id.
+        """
+        db_obj = (await session.scalars(self.delete_query(id_to_delete))).one_or_none()
+        await session.commit()
+        if db_obj is not None:
+            self.notify("delete", as_dict(db_obj))
+        return db_obj
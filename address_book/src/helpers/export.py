@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, List, Sequence
+
+import numpy as np
+
+from sqlalchemy import select
+
+from src.db.session import AsyncSessionLocal
+from src.helpers.utils import BoundingBox, within_bounding_boxes
+from src.models.model import Address
+
+EXPORT_COLUMNS = (
+    Address.id,
+    Address.street,
+    Address.city,
+    Address.state,
+    Address.country,
+    Address.latitude,
+    Address.longitude,
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def ndjson_chunk(keys: List[str], rows: Sequence[tuple]) -> str:
+    """
+    Encode rows as newline-delimited JSON objects.
+    """
+    return "".join(json.dumps(dict(zip(keys, row))) + "\n" for row in rows)
+
+
+def csv_chunk(rows: Sequence[tuple]) -> str:
+    """
+    Encode rows as CSV lines.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_addresses(
+    export_format: str, batch_size: int = 1000
+) -> AsyncIterator[str]:
+    """
+    Yield the whole address book, `batch_size` rows at a time, read through a
+    server-side cursor so memory does not grow with the table.
+
+    The session is owned by the generator because the response body is
+    produced after the request dependencies have been torn down.
+    """
+    keys = [column.key for column in EXPORT_COLUMNS]
+    if export_format == "csv":
+        yield csv_chunk([keys])
+
+    query = (
+        select(*EXPORT_COLUMNS)
+        .order_by(Address.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield csv_chunk(rows)
+            else:
+                yield ndjson_chunk(keys, rows)
+
+
+async def stream_addresses_within(
+    boxes: Sequence[BoundingBox],
+    contains: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    columns: Sequence = EXPORT_COLUMNS,
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """
+    Yield, as NDJSON, the addresses found by the R*Tree inside `boxes` for
+    which `contains(latitudes, longitudes)` holds, testing a batch of
+    `batch_size` rows at a time.
+    """
+    keys = [column.key for column in columns]
+    query = (
+        select(
+            *columns,
+            Address.latitude.label("within_latitude"),
+            Address.longitude.label("within_longitude"),
+        )
+        .where(within_bounding_boxes(boxes))
+        .order_by(Address.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            latitudes = np.fromiter(
+                (row[-2] for row in rows), dtype=np.float64, count=len(rows)
+            )
+            longitudes = np.fromiter(
+                (row[-1] for row in rows), dtype=np.float64, count=len(rows)
+            )
+            hits = [
+                rows[index] for index in np.flatnonzero(contains(latitudes, longitudes))
+            ]
+            if hits:
+                # `zip` with `keys` leaves out the trailing coordinate columns.
+                yield ndjson_chunk(keys, hits)
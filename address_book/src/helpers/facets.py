@@ -0,0 +1,92 @@
+from typing import List, Optional
+
+from sqlalchemy import Select, delete, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.models.model import Address, AddressFacet
+
+FACET_LEVELS = ("country", "state", "city")
+
+TOTAL_KEY = ("total", "", "", "")
+
+
+def facet_counts_query():
+    """
+    Every row of `address_facets`, computed from scratch by GROUP BY scans of
+    `addresses`.
+    """
+    names = [func.coalesce(getattr(Address, level), "") for level in FACET_LEVELS]
+    selects = [
+        select(literal("total"), *[literal("")] * 3, func.count()).select_from(Address)
+    ]
+    for depth, level in enumerate(FACET_LEVELS, start=1):
+        keys = names[:depth]
+        blanks = [literal("")] * (len(FACET_LEVELS) - depth)
+        selects.append(
+            select(literal(level), *keys, *blanks, func.count()).group_by(*keys)
+        )
+    return union_all(*selects)
+
+
+def rebuild_facets(session: Session) -> int:
+    """
+    Recompute `address_facets` from `addresses` in one transaction and return
+    the total number of addresses.
+    """
+    session.execute(delete(AddressFacet))
+    session.execute(
+        AddressFacet.__table__.insert().from_select(
+            ["facet", *FACET_LEVELS, "count"], facet_counts_query()
+        )
+    )
+    session.commit()
+    return session.get(AddressFacet, TOTAL_KEY).count
+
+
+async def address_total(session: AsyncSession) -> int:
+    """
+    Number of addresses, read from the maintained total instead of a COUNT(*).
+    """
+    total = await session.scalar(
+        select(AddressFacet.count).where(
+            AddressFacet.facet == "total",
+            AddressFacet.country == "",
+            AddressFacet.state == "",
+            AddressFacet.city == "",
+        )
+    )
+    return total or 0
+
+
+def facets_query(
+    facet: str,
+    country: Optional[str] = None,
+    state: Optional[str] = None,
+    limit: int = 100,
+) -> Select:
+    """
+    The largest counts of a facet, optionally within a country and state.
+    """
+    query = select(AddressFacet).where(AddressFacet.facet == facet)
+    if country is not None:
+        query = query.where(AddressFacet.country == country)
+    if state is not None:
+        query = query.where(AddressFacet.state == state)
+    return query.order_by(
+        AddressFacet.count.desc(),
+        AddressFacet.country,
+        AddressFacet.state,
+        AddressFacet.city,
+    ).limit(limit)
+
+
+async def facet_counts(
+    session: AsyncSession,
+    facet: str,
+    country: Optional[str] = None,
+    state: Optional[str] = None,
+    limit: int = 100,
+) -> List[AddressFacet]:
+    result = await session.scalars(facets_query(facet, country, state, limit))
+    return list(result)
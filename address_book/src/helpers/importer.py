@@ -0,0 +1,158 @@
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from src.helpers.crud_base import CrudBase
+from src.helpers.utils import find_existing_lat_long
+from src.models.model import Address, AddressImport
+from src.schemas.address_schemas import AddressCreate
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_REJECTION_SAMPLES = 20
+
+ProgressCallback = Callable[[AddressImport], None]
+
+
+def iter_records(lines: Iterable[str], import_format: str) -> Iterator[Any]:
+    """
+    Lazily parse CSV (with a header row) or NDJSON lines into records.
+    Unparsable NDJSON lines are yielded as `None` so they count as rejected.
+    """
+    if import_format == "csv":
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+class AddressImporter:
+    """
+    Imports a stream of address records in chunks, each committed together
+    with the import checkpoint so an interrupted run resumes after the last
+    committed chunk.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        job: AddressImport,
+        chunk_size: int = 1000,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        self.session = session
+        self.job = job
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.crud_obj = CrudBase(Address)
+
+    @classmethod
+    def start(cls, session: Session, source: str, import_format: str, **kwargs):
+        """
+        Register a new import job and return its importer.
+        """
+        job = AddressImport(
+            source=source,
+            format=import_format,
+            status="running",
+            rows_read=0,
+            rows_created=0,
+            rows_rejected=0,
+            rejections={},
+        )
+        session.add(job)
+        session.commit()
+        return cls(session, job, **kwargs)
+
+    @classmethod
+    def resume(cls, session: Session, job_id: int, **kwargs):
+        """
+        Return the importer of an unfinished job.
+        """
+        job = session.get(AddressImport, job_id)
+        if job is None:
+            raise ValueError(f"import `{job_id}` not found")
+        if job.status == "completed":
+            raise ValueError(f"import `{job_id}` already completed")
+        job.status = "running"
+        session.commit()
+        return cls(session, job, **kwargs)
+
+    def run(self, records: Iterable[Any]) -> AddressImport:
+        """
+        Import `records`, skipping those already committed by a previous run.
+        """
+        chunk: List[Tuple[int, Any]] = []
+        try:
+            for position, record in enumerate(records):
+                if position < self.job.rows_read:
+                    continue
+                chunk.append((position, record))
+                if len(chunk) == self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk)
+        except BaseException:
+            self.session.rollback()
+            self.job.status = "failed"
+            self.session.commit()
+            raise
+        self.job.status = "completed"
+        self.session.commit()
+        return self.job
+
+    def _import_chunk(self, chunk: List[Tuple[int, Any]]) -> None:
+        rejections: List[Tuple[int, str]] = []
+        valid: Dict[Tuple[float, float], Tuple[int, Dict[str, Any]]] = {}
+        for position, record in chunk:
+            try:
+                address = AddressCreate.model_validate(record)
+            except ValidationError as exc:
+                error = exc.errors()[0]
+                field = ".".join(str(part) for part in error["loc"]) or "record"
+                rejections.append((position, f"{field}: {error['msg']}"))
+                continue
+            coordinates = (address.latitude, address.longitude)
+            if coordinates in valid:
+                rejections.append((position, "duplicate latitude and longitude"))
+                continue
+            valid[coordinates] = (position, address.model_dump())
+
+        for coordinates in find_existing_lat_long(self.session, valid):
+            position, _ = valid.pop(coordinates)
+            rejections.append((position, "duplicate latitude and longitude"))
+
+        self._record(chunk[-1][0] + 1, len(valid), rejections)
+        # The checkpoint is flushed by the commit closing the insert, so both
+        # land in the same transaction.
+        created = self.crud_obj.create_multi(
+            self.session, objs_to_create=[row for _, row in valid.values()]
+        )
+        if not created:
+            self.session.commit()
+        if self.on_progress:
+            self.on_progress(self.job)
+
+    def _record(
+        self, rows_read: int, created: int, rejections: List[Tuple[int, str]]
+    ) -> None:
+        summary = dict(self.job.rejections or {})
+        reasons = dict(summary.get("reasons", {}))
+        samples = list(summary.get("samples", []))
+        for position, reason in rejections:
+            reasons[reason] = reasons.get(reason, 0) + 1
+            if len(samples) < MAX_REJECTION_SAMPLES:
+                samples.append({"record": position + 1, "reason": reason})
+        self.job.rejections = {"reasons": reasons, "samples": samples}
+        self.job.rows_read = rows_read
+        self.job.rows_created += created
+        self.job.rows_rejected += len(rejections)
+        self.session.add(self.job)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.db.session import SessionLocal
+from src.helpers.crud_base import register_write_listener
+from src.helpers.near_cache import near_cache
+from src.helpers.spatial_index import (
+    NearestIndex,
+    load_nearest_index,
+    nearest_index,
+    sync_nearest_index,
+)
+from src.helpers.suggest import (
+    SuggestIndex,
+    load_suggest_index,
+    suggest_index,
+    sync_suggest_index,
+)
+from src.models.model import Address, AddressImport
+
+logger = logging.getLogger(__name__)
+
+ImportsSignature = Tuple[int, int]
+
+
+def imports_signature(session: Session) -> ImportsSignature:
+    """
+    Number and created rows of the import jobs that are no longer running,
+    which changes whenever an import ends.
+    """
+    count, created = session.execute(
+        select(
+            func.count(), func.coalesce(func.sum(AddressImport.rows_created), 0)
+        ).where(AddressImport.status != "running")
+    ).one()
+    return count, created
+
+
+class IndexRefresher:
+    """
+    Keeps the in-memory address indexes in step with imports run by another
+    process, such as the CLI, whose writes never reach this process's write
+    listeners.
+
+    `refresh` rebuilds the indexes in a worker thread once an import has
+    ended, then swaps them in on the event loop. The writes committed through
+    the API meanwhile are recorded and replayed on the new indexes, so none
+    is lost. The near query cache is cleared as it may miss imported rows.
+    """
+
+    def __init__(self) -> None:
+        self.signature: Optional[ImportsSignature] = None
+        self._pending: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+
+    def record(self, operation: str, row: Dict[str, Any]) -> None:
+        if self._pending is not None:
+            self._pending.append((operation, row))
+
+    def load(self, session: Session) -> None:
+        """
+        Build the indexes from the database, at startup.
+        """
+        self.signature = imports_signature(session)
+        load_nearest_index(session)
+        load_suggest_index(session)
+
+    def _build(
+        self,
+    ) -> Optional[Tuple[ImportsSignature, NearestIndex, SuggestIndex]]:
+        with SessionLocal() as session:
+            signature = imports_signature(session)
+            if signature == self.signature:
+                return None
+            nearest, suggest = NearestIndex(), SuggestIndex()
+            load_nearest_index(session, nearest)
+            load_suggest_index(session, suggest)
+        return signature, nearest, suggest
+
+    async def refresh(self) -> bool:
+        """
+        Rebuild the indexes if an import ended since the last build, and tell
+        whether it did.
+        """
+        self._pending = []
+        try:
+            built = await run_in_threadpool(self._build)
+            if built is None:
+                return False
+            self.signature, nearest, suggest = built
+            nearest_index.replace(nearest)
+            suggest_index.replace(suggest)
+            for operation, row in self._pending:
+                sync_nearest_index(operation, row)
+                sync_suggest_index(operation, row)
+            near_cache.clear()
+        finally:
+            self._pending = None
+        return True
+
+    async def poll(self, interval: float) -> None:
+        """
+        Call `refresh` every `interval` seconds, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Address index refresh failed")
+
+
+index_refresher = IndexRefresher()
+register_write_listener(Address, index_refresher.record)
@@ -0,0 +1,329 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5)
+PREFIX = "address_book"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    """
+    The SQL run on behalf of one request.
+    """
+
+    __slots__ = ("statements", "db_seconds", "queries", "max_queries")
+
+    def __init__(self, max_queries: int) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.queries: List[Tuple[str, float]] = []
+        self.max_queries = max_queries
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if len(self.queries) < self.max_queries:
+            self.queries.append((statement, seconds))
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of observations for one label set.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield repr(bound), total
+        yield "+Inf", self.count
+
+
+def _labels(**labels: Any) -> str:
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+    return (
+        "{"
+        + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+        + "}"
+    )
+
+
+class MetricsRegistry:
+    """
+    Request, SQL, cache and pool metrics of this process, rendered in the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.route_db: Dict[Tuple[str, str], List[float]] = {}
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.engines: Dict[str, Engine] = {}
+        self.caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe_statement(self, seconds: float) -> None:
+        with self._lock:
+            self.statements += 1
+            self.db_seconds += seconds
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+    ) -> None:
+        with self._lock:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get((method, route))
+            if histogram is None:
+                histogram = self.latency[(method, route)] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            totals = self.route_db.setdefault((method, route), [0, 0.0])
+            totals[0] += stats.statements
+            totals[1] += stats.db_seconds
+
+    def register_engine(self, name: str, engine: Engine) -> None:
+        self.engines[name] = engine
+
+    def register_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self.caches[name] = stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> str:
+            full_name = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            return full_name
+
+        with self._lock:
+            name = family("http_requests_in_flight", "gauge", "Requests being served.")
+            lines.append(f"{name} {self.in_flight}")
+
+            name = family("http_requests_total", "counter", "Requests served.")
+            for (method, route, status), count in sorted(self.requests.items()):
+                labels = _labels(method=method, route=route, status=status)
+                lines.append(f"{name}{labels} {count}")
+
+            name = family(
+                "http_request_duration_seconds", "histogram", "Request latency."
+            )
+            for (method, route), histogram in sorted(self.latency.items()):
+                for bound, count in histogram.cumulative():
+                    labels = _labels(method=method, route=route, le=bound)
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"{name}_sum{labels} {histogram.sum}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+
+            statements = family(
+                "http_request_db_statements_total",
+                "counter",
+                "SQL statements run by requests.",
+            )
+            for (method, route), (count, _) in sorted(self.route_db.items()):
+                labels = _labels(method=method, route=route)
+                lines.append(f"{statements}{labels} {count}")
+            seconds = family(
+                "http_request_db_seconds_total",
+                "counter",
+                "Time requests spent running SQL statements.",
+            )
+            for (method, route), (_, total) in sorted(self.route_db.items()):
+                labels = _labels(method=method, route=route)
+                lines.append(f"{seconds}{labels} {total}")
+
+            name = family("db_statements_total", "counter", "SQL statements run.")
+            lines.append(f"{name} {self.statements}")
+            name = family(
+                "db_seconds_total", "counter", "Time spent running SQL statements."
+            )
+            lines.append(f"{name} {self.db_seconds}")
+
+        self._render_pools(family, lines)
+        self._render_caches(family, lines)
+        return "\n".join(lines) + "\n"
+
+    def _render_pools(self, family, lines: List[str]) -> None:
+        gauges = (
+            ("size", "Connections the pool keeps open."),
+            ("checkedout", "Connections in use."),
+            ("checkedin", "Idle connections in the pool."),
+        )
+        for attribute, help_text in gauges:
+            name = family(f"db_pool_{attribute}", "gauge", help_text)
+            for engine_name, engine in sorted(self.engines.items()):
+                method = getattr(engine.pool, attribute, None)
+                if method is not None:
+                    lines.append(f"{name}{_labels(engine=engine_name)} {method()}")
+
+    def _render_caches(self, family, lines: List[str]) -> None:
+        stats = {name: collect() for name, collect in sorted(self.caches.items())}
+        metrics = (
+            ("hits", "counter", "cache_hits_total", "Cache hits."),
+            ("misses", "counter", "cache_misses_total", "Cache misses."),
+            ("evictions", "counter", "cache_evictions_total", "Cache evictions."),
+            ("entries", "gauge", "cache_entries", "Cached entries."),
+        )
+        for key, kind, metric, help_text in metrics:
+            name = family(metric, kind, help_text)
+            for cache, values in stats.items():
+                # `LRUTTLCache` reports its entry count as `size`.
+                value = values.get(
+                    key, values.get("size") if key == "entries" else None
+                )
+                if value is not None:
+                    lines.append(f"{name}{_labels(cache=cache)} {value}")
+
+
+metrics = MetricsRegistry()
+
+
+def before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.observe_statement(seconds)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+
+def handle_error(context) -> None:
+    # A failed statement never reaches `after_cursor_execute`.
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time every statement `engine` runs, and add it to the stats of the
+    request being served, if any.
+    """
+    metrics.register_engine(name, engine)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and SQL work of every HTTP request, and log the
+    statements of requests slower than `slow_request_threshold` seconds.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_request_threshold: float = 1.0,
+        slow_request_max_statements: int = 20,
+    ) -> None:
+        self.app = app
+        self.slow_request_threshold = slow_request_threshold
+        self.slow_request_max_statements = slow_request_max_statements
+        self._route_paths: Optional[Dict[Any, str]] = None
+
+    def route_path(self, scope: Scope) -> str:
+        """
+        The path template of the route that served the request, to keep the
+        label values bounded.
+        """
+        if self._route_paths is None:
+            self._route_paths = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._route_paths.get(scope.get("endpoint"), UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(self.slow_request_max_statements)
+        token = request_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.in_flight -= 1
+            request_stats.reset(token)
+            route = self.route_path(scope)
+            metrics.observe_request(scope["method"], route, status, seconds, stats)
+            if seconds >= self.slow_request_threshold:
+                self.log_slow_request(scope, status, seconds, stats)
+
+    def log_slow_request(
+        self, scope: Scope, status: int, seconds: float, stats: RequestStats
+    ) -> None:
+        queries = "".join(
+            f"\n  {query_seconds * 1000:.1f} ms: {' '.join(statement.split())}"
+            for statement, query_seconds in stats.queries
+        )
+        omitted = stats.statements - len(stats.queries)
+        # ERROR is the level the application's log handlers let through.
+        logger.error(
+            f"Slow request: {scope['method']} {scope['path']} {status} "
+            f"{seconds * 1000:.1f} ms, {stats.statements} statements in "
+            f"{stats.db_seconds * 1000:.1f} ms{queries}"
+            + (f"\n  ... {omitted} more statements" if omitted > 0 else "")
+        )
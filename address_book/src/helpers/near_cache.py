@@ -0,0 +1,304 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import get_app_settings
+from src.helpers.crud_base import AsyncCrudBase, register_write_listener
+from src.helpers.utils import (
+    bounding_boxes,
+    chunked,
+    haversine,
+    haversine_batch,
+    within_bounding_boxes,
+)
+from src.models.model import Address
+
+NearKey = Tuple[int, int, int]
+Cell = Tuple[int, int]
+
+
+class _Entry:
+    __slots__ = ("ids", "center", "coverage", "expires_at")
+
+    def __init__(
+        self,
+        ids: List[int],
+        center: Tuple[float, float],
+        coverage: float,
+        expires_at: float,
+    ) -> None:
+        self.ids = ids
+        self.center = center
+        self.coverage = coverage
+        self.expires_at = expires_at
+
+
+class NearQueryCache:
+    """
+    Cache of `/address/near` candidates keyed by the query location snapped to
+    a grid of `grid` degrees and by the radius rounded up to a multiple of
+    `radius_bucket` kilometers.
+
+    An entry holds the ids of every address within its coverage: the bucketed
+    radius plus the distance from the cell center to its farthest corner. That
+    is a superset of the answer for any query falling in the cell, which is
+    then found by re-checking the exact distances. Writes only invalidate the
+    entries whose coverage holds the old or the new coordinates, and the
+    total number of cached ids is bounded by `max_ids`. Cached cells are
+    indexed by radius bucket, so a write only looks at the cells within reach
+    of its coordinates rather than at every entry.
+    """
+
+    def __init__(
+        self, grid: float, radius_bucket: float, max_ids: int, ttl: float
+    ) -> None:
+        self.grid = grid
+        self.radius_bucket = radius_bucket
+        self.max_ids = max_ids
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._size = 0
+        self._generation = 0
+        self._entries: "OrderedDict[NearKey, _Entry]" = OrderedDict()
+        self._keys_by_id: Dict[int, Set[NearKey]] = {}
+        self._cells_by_radius: Dict[int, Set[Cell]] = {}
+        # No cell center is farther from its corners than at the equator.
+        self._half_diagonal = haversine(0.0, 0.0, grid / 2, grid / 2)
+        self._lock = threading.Lock()
+
+    def key(self, latitude: float, longitude: float, radius: float) -> NearKey:
+        return (
+            math.floor(latitude / self.grid),
+            math.floor(longitude / self.grid),
+            max(1, math.ceil(radius / self.radius_bucket)),
+        )
+
+    def coverage(self, key: NearKey) -> Tuple[Tuple[float, float], float]:
+        """
+        Return the cell center and the radius, in kilometers, an entry must
+        cover to answer every query mapped to `key`.
+        """
+        lat_index, lon_index, radius_index = key
+        south, west = lat_index * self.grid, lon_index * self.grid
+        north, east = south + self.grid, west + self.grid
+        center = ((south + north) / 2, (west + east) / 2)
+        farthest_corner = max(
+            haversine(*center, lat, lon)
+            for lat in (max(south, -90.0), min(north, 90.0))
+            for lon in (west, east)
+        )
+        return center, radius_index * self.radius_bucket + farthest_corner
+
+    @property
+    def generation(self) -> int:
+        """
+        Incremented by every invalidation, so that candidates read before a
+        concurrent write are not cached.
+        """
+        return self._generation
+
+    def get(self, key: NearKey) -> Optional[List[int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.ids
+
+    def set(self, key: NearKey, ids: List[int], generation: int) -> None:
+        center, coverage = self.coverage(key)
+        with self._lock:
+            if generation != self._generation or len(ids) > self.max_ids:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(
+                ids, center, coverage, time.monotonic() + self.ttl
+            )
+            self._size += len(ids)
+            self._cells_by_radius.setdefault(key[2], set()).add(key[:2])
+            for address_id in ids:
+                self._keys_by_id.setdefault(address_id, set()).add(key)
+            while self._size > self.max_ids:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: NearKey) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.ids)
+        cells = self._cells_by_radius[key[2]]
+        cells.discard(key[:2])
+        if not cells:
+            del self._cells_by_radius[key[2]]
+        for address_id in entry.ids:
+            keys = self._keys_by_id.get(address_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_id[address_id]
+
+    def invalidate(
+        self, address_id: int, latitude: Optional[float], longitude: Optional[float]
+    ) -> None:
+        """
+        Drop the entries listing `address_id`, which cover its old
+        coordinates, and those covering its new coordinates, if any.
+        """
+        with self._lock:
+            self._generation += 1
+            stale = set(self._keys_by_id.get(address_id, ()))
+            if latitude is not None and longitude is not None:
+                stale.update(
+                    key
+                    for key in self._keys_near(latitude, longitude)
+                    if haversine(*self._entries[key].center, latitude, longitude)
+                    <= self._entries[key].coverage
+                )
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def _keys_near(self, latitude: float, longitude: float) -> List[NearKey]:
+        """
+        The keys of the cached cells whose center lies in the bounding boxes
+        of the largest coverage of their radius bucket around a location: a
+        superset of the entries covering it.
+        """
+        keys = []
+        for radius_index, cells in self._cells_by_radius.items():
+            reach = radius_index * self.radius_bucket + self._half_diagonal
+            ranges = [
+                (
+                    range(
+                        math.floor(min_lat / self.grid),
+                        math.floor(max_lat / self.grid) + 1,
+                    ),
+                    range(
+                        math.floor(min_lon / self.grid),
+                        math.floor(max_lon / self.grid) + 1,
+                    ),
+                )
+                for min_lat, max_lat, min_lon, max_lon in bounding_boxes(
+                    latitude, longitude, reach
+                )
+            ]
+            # Visit the cells in reach, unless more of them exist than are
+            # cached for this radius.
+            if sum(len(lats) * len(lons) for lats, lons in ranges) <= len(cells):
+                nearby = [
+                    (lat_index, lon_index)
+                    for lats, lons in ranges
+                    for lat_index in lats
+                    for lon_index in lons
+                    if (lat_index, lon_index) in cells
+                ]
+            else:
+                nearby = [
+                    cell
+                    for cell in cells
+                    if any(cell[0] in lats and cell[1] in lons for lats, lons in ranges)
+                ]
+            keys.extend((*cell, radius_index) for cell in nearby)
+        return keys
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_id.clear()
+            self._cells_by_radius.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "cached_ids": self._size,
+            "max_ids": self.max_ids,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+async def near_candidates(
+    session: AsyncSession,
+    crud_obj: AsyncCrudBase,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    columns: Optional[Sequence] = None,
+) -> list:
+    """
+    Load a superset of the addresses within `radius` of a location, through
+    `near_cache` when enabled.
+
+    `columns` is passed on to `get_multi`, and must then include the id,
+    latitude and longitude.
+    """
+    if not settings.near_cache_enabled:
+        boxes = bounding_boxes(latitude, longitude, radius)
+        return await crud_obj.get_multi(
+            session, query_filter=within_bounding_boxes(boxes), columns=columns
+        )
+
+    key = near_cache.key(latitude, longitude, radius)
+    ids = near_cache.get(key)
+    if ids is not None:
+        addresses = []
+        for chunk in chunked(ids, 500):
+            addresses.extend(
+                await crud_obj.get_multi(
+                    session, query_filter=Address.id.in_(chunk), columns=columns
+                )
+            )
+        return addresses
+
+    generation = near_cache.generation
+    (center_lat, center_lon), coverage = near_cache.coverage(key)
+    boxes = bounding_boxes(center_lat, center_lon, coverage)
+    addresses = await crud_obj.get_multi(
+        session, query_filter=within_bounding_boxes(boxes), columns=columns
+    )
+    _, mask = haversine_batch(
+        center_lat,
+        center_lon,
+        [address.latitude for address in addresses],
+        [address.longitude for address in addresses],
+        coverage,
+    )
+    addresses = [address for address, covered in zip(addresses, mask) if covered]
+    near_cache.set(key, [address.id for address in addresses], generation)
+    return addresses
+
+
+def invalidate_near_cache(operation: str, row: dict) -> None:
+    """
+    Drop the near-query entries a committed address write may have changed.
+    """
+    near_cache.invalidate(row["id"], row.get("latitude"), row.get("longitude"))
+
+
+settings = get_app_settings()
+
+near_cache = NearQueryCache(
+    grid=settings.near_cache_grid,
+    radius_bucket=settings.near_cache_radius_bucket,
+    max_ids=settings.near_cache_max_ids,
+    ttl=settings.cache_ttl,
+)
+
+register_write_listener(Address, invalidate_near_cache)
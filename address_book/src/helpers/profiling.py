@@ -0,0 +1,128 @@
+import cProfile
+import hmac
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import get_app_settings
+
+PROFILE_SUFFIX = ".pstats"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.pstats$")
+
+
+class ProfileStore:
+    """
+    The directory holding saved profiles, pruned to the `keep` most recent.
+    """
+
+    def __init__(self, directory: Path, keep: int) -> None:
+        self.directory = directory
+        self.keep = keep
+
+    def new_name(self, method: str, path: str) -> str:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        slug = re.sub(r"[^\w]+", "_", path).strip("_")[:60] or "root"
+        return f"{timestamp}-{method}-{slug}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+
+    def save(self, profile: cProfile.Profile, name: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / name
+        profile.dump_stats(path)
+        for stale in self.list()[self.keep :]:
+            stale.unlink(missing_ok=True)
+        return path
+
+    def list(self) -> List[Path]:
+        """
+        Saved profiles, most recent first.
+        """
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            self.directory.glob(f"*{PROFILE_SUFFIX}"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+
+    def get(self, name: str) -> Optional[Path]:
+        """
+        The saved profile called `name`, refusing anything that is not a plain
+        profile file name.
+        """
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """
+    Run requests under cProfile and save their stats, for requests sending
+    `token` in the `header` and for a random `sample_rate` share of the others.
+
+    cProfile only sees the thread it was enabled in, and one profile runs at a
+    time: a request arriving while another is profiled is served normally.
+    The event loop is shared, so the profile also holds whatever ran
+    concurrently with the profiled request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        header: str,
+        token: str,
+        sample_rate: float = 0.0,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.header = header.lower().encode("latin-1")
+        self.token = token
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    def wants_profile(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return hmac.compare_digest(value.decode("latin-1"), self.token)
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        name = self.store.new_name(scope["method"], scope["path"])
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", name.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+                self.store.save(profile, name)
+        finally:
+            self._lock.release()
+
+
+settings = get_app_settings()
+profile_store = ProfileStore(
+    settings.base_dir / settings.profiling_dir, keep=settings.profiling_keep
+)
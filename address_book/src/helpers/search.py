@@ -0,0 +1,49 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.model import Address, address_fts
+
+
+def match_expression(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word of it, the last
+    one as a prefix so results follow the user as they type.
+
+    Each word is quoted, so FTS5 operators and syntax characters in the input
+    are searched for literally instead of being interpreted.
+    """
+    terms = ['"{}"'.format(word.replace('"', '""')) for word in text.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_query(text: str, limit: int, after: Optional[Sequence] = None) -> Select:
+    """
+    Addresses matching `text` with their bm25 rank, best first, starting after
+    the `(rank, id)` of the last row of the previous page.
+    """
+    query = (
+        select(Address, address_fts.c.rank)
+        .join(address_fts, address_fts.c.rowid == Address.id)
+        .where(address_fts.c.addresses_fts.op("MATCH")(match_expression(text)))
+        .order_by(address_fts.c.rank, address_fts.c.rowid)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(
+            tuple_(address_fts.c.rank, address_fts.c.rowid) > tuple_(*after)
+        )
+    return query
+
+
+async def search_addresses(
+    session: AsyncSession, text: str, limit: int, after: Optional[Sequence] = None
+) -> List[Tuple[Address, float]]:
+    """
+    Run `search_query`, returning `(address, rank)` pairs.
+    """
+    result = await session.execute(search_query(text, limit, after))
+    return [(address, rank) for address, rank in result]
@@ -0,0 +1,48 @@
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi.responses import ORJSONResponse
+from starlette.status import HTTP_200_OK
+
+from src.schemas.address_schemas import AddressOut
+from src.schemas.response import Response
+
+ADDRESS_FIELDS = tuple(AddressOut.model_fields)
+
+RESPONSE_DEFAULTS = {
+    name: field.default
+    for name, field in Response.model_fields.items()
+    if field.default is not None
+}
+
+_address_values = attrgetter(*ADDRESS_FIELDS)
+
+
+def address_dict(address: Any) -> Dict[str, Any]:
+    """
+    The `AddressOut` fields of an address row, read without validation.
+    """
+    return dict(zip(ADDRESS_FIELDS, _address_values(address)))
+
+
+def address_dicts(
+    addresses: Iterable[Any], fields: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    The `AddressOut` fields, or only `fields`, of address rows.
+    """
+    if fields is None:
+        return [dict(zip(ADDRESS_FIELDS, _address_values(row))) for row in addresses]
+    return [{field: getattr(row, field) for field in fields} for row in addresses]
+
+
+def fast_response(status_code: int = HTTP_200_OK, **content: Any) -> ORJSONResponse:
+    """
+    The `Response` envelope encoded straight by orjson.
+
+    Returning a response object skips FastAPI's `response_model` validation,
+    so the data must already be plain JSON types, as read from the database.
+    Like `Response`, it leaves out the `null` envelope fields.
+    """
+    content = {key: value for key, value in content.items() if value is not None}
+    return ORJSONResponse({**RESPONSE_DEFAULTS, **content}, status_code=status_code)
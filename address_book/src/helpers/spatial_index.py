@@ -0,0 +1,237 @@
+import heapq
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.helpers.crud_base import register_write_listener
+from src.helpers.utils import EARTH_RADIUS
+from src.models.model import Address
+
+Point = Tuple[float, float, float]
+
+# Inserts never rebalance the tree and deletes leave dead nodes that every
+# search still walks, so it is rebuilt from its live points once the writes
+# since the last build exceed this share of them, keeping writes amortized
+# O(log n).
+REBUILD_RATIO = 0.5
+REBUILD_MIN_WRITES = 1024
+
+
+def to_unit_vector(latitude: float, longitude: float) -> Point:
+    """
+    Project a coordinate in decimal degrees onto the unit sphere.
+    """
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def chord_to_distance(squared_chord: float) -> float:
+    """
+    Convert a squared chord length on the unit sphere into a great circle
+    distance in kilometers.
+    """
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class _Node:
+    __slots__ = ("point", "item_id", "axis", "left", "right", "deleted")
+
+    def __init__(self, point: Point, item_id: int, axis: int) -> None:
+        self.point = point
+        self.item_id = item_id
+        self.axis = axis
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.deleted = False
+
+
+class NearestIndex:
+    """
+    In-memory KD-tree answering k-nearest-neighbour queries by great circle
+    distance.
+
+    Coordinates are stored as 3-d unit vectors, where the straight-line
+    (chord) distance grows monotonically with the great circle distance, so
+    a plain euclidean KD-tree gives the correct ordering. Inserts descend the
+    tree in O(log n) and deletes only tombstone the node, which keeps every
+    write incremental; the tree is rebuilt balanced once enough writes have
+    piled up.
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[_Node] = None
+        self._nodes: Dict[int, _Node] = {}
+        self._writes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def build(self, items: Iterable[Tuple[int, float, float]]) -> None:
+        """
+        Replace the tree with a balanced one built from
+        `(id, latitude, longitude)` tuples.
+        """
+        ids, latitudes, longitudes = [], [], []
+        for item_id, latitude, longitude in items:
+            if latitude is not None and longitude is not None:
+                ids.append(item_id)
+                latitudes.append(latitude)
+                longitudes.append(longitude)
+        lats = np.radians(np.asarray(latitudes, dtype=np.float64))
+        lons = np.radians(np.asarray(longitudes, dtype=np.float64))
+        coords = np.column_stack(
+            (np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats))
+        )
+        self._build(ids, coords)
+
+    def _build(self, ids: List[int], coords: np.ndarray) -> None:
+        points = [tuple(point) for point in coords.tolist()]
+        nodes: Dict[int, _Node] = {}
+
+        def _build(indices: list, depth: int) -> Optional[_Node]:
+            if not indices:
+                return None
+            axis = depth % 3
+            median = len(indices) // 2
+            if len(indices) > 4096:
+                order = np.argpartition(coords[indices, axis], median)
+                indices = [indices[position] for position in order.tolist()]
+            else:
+                indices = sorted(indices, key=lambda position: points[position][axis])
+            position = indices[median]
+            node = _Node(points[position], ids[position], axis)
+            nodes[node.item_id] = node
+            node.left = _build(indices[:median], depth + 1)
+            node.right = _build(indices[median + 1 :], depth + 1)
+            return node
+
+        root = _build(list(range(len(ids))), 0)
+        with self._lock:
+            self._root, self._nodes, self._writes = root, nodes, 0
+
+    def _rebuild_if_stale(self) -> None:
+        if self._writes > max(REBUILD_MIN_WRITES, REBUILD_RATIO * len(self._nodes)):
+            ids = list(self._nodes)
+            points = [self._nodes[item_id].point for item_id in ids]
+            self._build(ids, np.asarray(points, dtype=np.float64).reshape(-1, 3))
+
+    def replace(self, other: "NearestIndex") -> None:
+        """
+        Take over the points of `other`, built on the side.
+        """
+        with self._lock:
+            self._root, self._nodes = other._root, other._nodes
+            self._writes = other._writes
+
+    def insert(self, item_id: int, latitude: float, longitude: float) -> None:
+        """
+        Add a point, replacing any previous point stored for `item_id`.
+        """
+        point = to_unit_vector(latitude, longitude)
+        with self._lock:
+            self._discard(item_id)
+            if self._root is None:
+                node = self._root = _Node(point, item_id, 0)
+            else:
+                parent = self._root
+                while True:
+                    branch = (
+                        "left"
+                        if point[parent.axis] < parent.point[parent.axis]
+                        else "right"
+                    )
+                    child = getattr(parent, branch)
+                    if child is None:
+                        node = _Node(point, item_id, (parent.axis + 1) % 3)
+                        setattr(parent, branch, node)
+                        break
+                    parent = child
+            self._nodes[item_id] = node
+            self._writes += 1
+            self._rebuild_if_stale()
+
+    def remove(self, item_id: int) -> None:
+        """
+        Drop the point stored for `item_id`, if any.
+        """
+        with self._lock:
+            self._discard(item_id)
+            self._rebuild_if_stale()
+
+    def _discard(self, item_id: int) -> None:
+        node = self._nodes.pop(item_id, None)
+        if node is not None:
+            node.deleted = True
+            self._writes += 1
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to `k` `(id, distance_km)` pairs ordered by distance.
+        """
+        target = to_unit_vector(latitude, longitude)
+        # Max-heap of the best candidates so far, as (-squared_chord, id).
+        best: List[Tuple[float, int]] = []
+        with self._lock:
+            stack = [(self._root, 0.0)] if self._root is not None else []
+            while stack:
+                node, bound = stack.pop()
+                if len(best) == k and bound >= -best[0][0]:
+                    continue
+                if not node.deleted:
+                    squared = (
+                        (node.point[0] - target[0]) ** 2
+                        + (node.point[1] - target[1]) ** 2
+                        + (node.point[2] - target[2]) ** 2
+                    )
+                    if len(best) < k:
+                        heapq.heappush(best, (-squared, node.item_id))
+                    elif squared < -best[0][0]:
+                        heapq.heapreplace(best, (-squared, node.item_id))
+                diff = target[node.axis] - node.point[node.axis]
+                near, far = (
+                    (node.left, node.right) if diff < 0 else (node.right, node.left)
+                )
+                # Push the far side first so the near side is explored first.
+                if far is not None:
+                    stack.append((far, max(bound, diff * diff)))
+                if near is not None:
+                    stack.append((near, bound))
+        return [
+            (item_id, chord_to_distance(-negated))
+            for negated, item_id in sorted(
+                best, key=lambda entry: (-entry[0], entry[1])
+            )
+        ]
+
+
+nearest_index = NearestIndex()
+
+
+def load_nearest_index(session: Session, index: NearestIndex = nearest_index) -> None:
+    """
+    Build `index`, `nearest_index` by default, from every address in the
+    database.
+    """
+    rows = session.execute(select(Address.id, Address.latitude, Address.longitude))
+    index.build(rows)
+
+
+def sync_nearest_index(operation: str, row: dict) -> None:
+    """
+    Keep `nearest_index` in step with committed address writes.
+    """
+    if operation == "delete" or row.get("latitude") is None:
+        nearest_index.remove(row["id"])
+    else:
+        nearest_index.insert(row["id"], row["latitude"], row["longitude"])
+
+
+register_write_listener(Address, sync_nearest_index)
@@ -0,0 +1,203 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.helpers.crud_base import register_write_listener
+from src.models.model import Address
+
+SUGGEST_FIELDS = ("city", "state", "country")
+
+# Prefixes up to this length match enough values for ranking them to be worth
+# memoizing.
+MEMO_PREFIX_LENGTH = 3
+
+
+class _FieldIndex:
+    """
+    Distinct values of one column with their row counts, kept sorted by their
+    case folded form so that the values starting with a prefix are a slice.
+    """
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+        self.counts: List[int] = []
+        self.keys: List[Tuple[str, int]] = []
+        self.memo: Dict[str, Dict[int, List[Tuple[str, int]]]] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.counts.append(0)
+        return code
+
+    def add(self, code: int) -> None:
+        if self.counts[code] == 0:
+            insort(self.keys, (self.values[code].casefold(), code))
+        self.counts[code] += 1
+        self._forget(code)
+
+    def discard(self, code: int) -> None:
+        self.counts[code] -= 1
+        if self.counts[code] == 0:
+            key = (self.values[code].casefold(), code)
+            del self.keys[bisect_left(self.keys, key)]
+        self._forget(code)
+
+    def _forget(self, code: int) -> None:
+        if self.memo:
+            folded = self.values[code].casefold()
+            for length in range(1, MEMO_PREFIX_LENGTH + 1):
+                self.memo.pop(folded[:length], None)
+
+    def top(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        folded = prefix.casefold()
+        memoized = self.memo.get(folded, {}).get(limit)
+        if memoized is not None:
+            return memoized
+        start = bisect_left(self.keys, (folded,))
+        end = bisect_left(self.keys, (folded + "\U0010ffff",), start)
+        best = heapq.nsmallest(
+            limit,
+            self.keys[start:end],
+            key=lambda key: (-self.counts[key[1]], key[0]),
+        )
+        result = [(self.values[code], self.counts[code]) for _, code in best]
+        if len(folded) <= MEMO_PREFIX_LENGTH:
+            self.memo.setdefault(folded, {})[limit] = result
+        return result
+
+
+class SuggestIndex:
+    """
+    In-memory autocomplete over the distinct city, state and country names,
+    ranked by how many addresses use them.
+
+    Every address's values are remembered as small integer codes in a numpy
+    array indexed by id, so that updates and deletes, which only know the new
+    row or the id, can decrement the values being replaced.
+    """
+
+    def __init__(self) -> None:
+        self._fields = {field: _FieldIndex() for field in SUGGEST_FIELDS}
+        self._rows = np.full((0, len(SUGGEST_FIELDS)), -1, dtype=np.int32)
+        self._lock = threading.RLock()
+
+    def build(self, rows: Iterable[Sequence]) -> None:
+        """
+        Replace the index with one built from `(id, city, state, country)`
+        tuples.
+        """
+        fields = {field: _FieldIndex() for field in SUGGEST_FIELDS}
+        ids, codes = [], []
+        for item_id, *values in rows:
+            ids.append(item_id)
+            codes.append(
+                [
+                    fields[field].code(value) if value else -1
+                    for field, value in zip(SUGGEST_FIELDS, values)
+                ]
+            )
+        table = np.full((max(ids, default=-1) + 1, len(SUGGEST_FIELDS)), -1, np.int32)
+        if ids:
+            table[ids] = codes
+        for position, index in enumerate(fields.values()):
+            column = table[:, position]
+            index.counts = np.bincount(
+                column[column >= 0], minlength=len(index.values)
+            ).tolist()
+            index.keys = sorted(
+                (value.casefold(), code)
+                for code, value in enumerate(index.values)
+                if index.counts[code]
+            )
+        with self._lock:
+            self._fields, self._rows = fields, table
+
+    def replace(self, other: "SuggestIndex") -> None:
+        """
+        Take over the counts of `other`, built on the side.
+        """
+        with self._lock:
+            self._fields, self._rows = other._fields, other._rows
+
+    def _store(self, item_id: int, values: Sequence[Optional[str]]) -> List[int]:
+        if item_id >= len(self._rows):
+            grown = np.full(
+                (max(item_id + 1, 2 * len(self._rows)), len(SUGGEST_FIELDS)),
+                -1,
+                dtype=np.int32,
+            )
+            grown[: len(self._rows)] = self._rows
+            self._rows = grown
+        codes = [
+            self._fields[field].code(value) if value else -1
+            for field, value in zip(SUGGEST_FIELDS, values)
+        ]
+        self._rows[item_id] = codes
+        return codes
+
+    def remove(self, item_id: int) -> None:
+        """
+        Stop counting the values of the address `item_id`.
+        """
+        with self._lock:
+            if item_id >= len(self._rows):
+                return
+            for field, code in zip(SUGGEST_FIELDS, self._rows[item_id].tolist()):
+                if code >= 0:
+                    self._fields[field].discard(code)
+            self._rows[item_id] = -1
+
+    def upsert(self, item_id: int, values: Sequence[Optional[str]]) -> None:
+        """
+        Count `(city, state, country)` for the address `item_id`, replacing
+        its previous values.
+        """
+        with self._lock:
+            self.remove(item_id)
+            for field, code in zip(SUGGEST_FIELDS, self._store(item_id, values)):
+                if code >= 0:
+                    self._fields[field].add(code)
+
+    def suggest(self, field: str, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """
+        Return up to `limit` `(value, count)` pairs of `field` starting with
+        `prefix`, case insensitively, most used first.
+        """
+        with self._lock:
+            return self._fields[field].top(prefix, limit)
+
+
+suggest_index = SuggestIndex()
+
+
+def load_suggest_index(session: Session, index: SuggestIndex = suggest_index) -> None:
+    """
+    Build `index`, `suggest_index` by default, from every address in the
+    database.
+    """
+    rows = session.execute(
+        select(Address.id, Address.city, Address.state, Address.country)
+    )
+    index.build(rows)
+
+
+def sync_suggest_index(operation: str, row: dict) -> None:
+    """
+    Keep `suggest_index` in step with committed address writes.
+    """
+    if operation == "delete":
+        suggest_index.remove(row["id"])
+    else:
+        suggest_index.upsert(row["id"], [row.get(field) for field in SUGGEST_FIELDS])
+
+
+register_write_listener(Address, sync_suggest_index)
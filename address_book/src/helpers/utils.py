@@ -1,9 +1,17 @@
 import math
+from typing import Iterable, Iterator, List, Sequence, Set, Tuple
 
-from src.helpers.crud_base import CrudBase
-from src.models.model import Address
+import numpy as np
+
+from src.models.model import Address, address_rtree
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_, select, tuple_
+
+# Radius of earth in kilometers. Use 3956 for miles
+EARTH_RADIUS = 6371
+
+BoundingBox = Tuple[float, float, float, float]
 
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -23,43 +31,457 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     )
     c = 2 * math.asin(math.sqrt(a))
 
-    # Radius of earth in kilometers. Use 3956 for miles
-    radius_earth = 6371
-    distance = radius_earth * c
+    distance = EARTH_RADIUS * c
     return distance
 
 
+def bounding_boxes(lat: float, lon: float, radius: float) -> List[BoundingBox]:
+    """
+    Return the (min_lat, max_lat, min_lon, max_lon) boxes enclosing the circle
+    of `radius` kilometers around a point. A circle crossing the antimeridian
+    is split into two boxes.
+    """
+    angular_radius = radius / EARTH_RADIUS
+    delta_lat = math.degrees(angular_radius)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+
+    # The circle covers a pole, so every longitude is a candidate.
+    if min_lat <= -90 or max_lat >= 90 or angular_radius >= math.pi / 2:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    delta_lon = math.degrees(
+        math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(lat))))
+    )
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        return [
+            (min_lat, max_lat, min_lon + 360, 180.0),
+            (min_lat, max_lat, -180.0, max_lon),
+        ]
+    if max_lon > 180:
+        return [
+            (min_lat, max_lat, min_lon, 180.0),
+            (min_lat, max_lat, -180.0, max_lon - 360),
+        ]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def bbox_boxes(
+    west: float, south: float, east: float, north: float
+) -> List[BoundingBox]:
+    """
+    Return the (min_lat, max_lat, min_lon, max_lon) boxes covering a GeoJSON
+    bbox. A bbox whose west edge lies east of its east edge crosses the
+    antimeridian and is split into two boxes.
+    """
+    if west > east:
+        return [(south, north, west, 180.0), (south, north, -180.0, east)]
+    return [(south, north, west, east)]
+
+
+def within_bounding_boxes(boxes: List[BoundingBox]):
+    """
+    Build an `Address` filter that only matches rows whose coordinates fall
+    inside one of the given boxes, resolved through the R*Tree index.
+    """
+    rtree_ids = select(address_rtree.c.id).where(
+        or_(
+            *[
+                and_(
+                    address_rtree.c.max_lat >= min_lat,
+                    address_rtree.c.min_lat <= max_lat,
+                    address_rtree.c.max_lon >= min_lon,
+                    address_rtree.c.min_lon <= max_lon,
+                )
+                for min_lat, max_lat, min_lon, max_lon in boxes
+            ]
+        )
+    )
+    return Address.id.in_(rtree_ids)
+
+
+def haversine_batch(
+    target_lat: float,
+    target_lon: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    radius: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized `haversine` from one target to many points.
+
+    Returns the distances in kilometers and a boolean mask of the points
+    lying within `radius` of the target.
+    """
+    lats = np.radians(np.ascontiguousarray(latitudes, dtype=np.float64))
+    lons = np.radians(np.ascontiguousarray(longitudes, dtype=np.float64))
+    target_lat, target_lon = math.radians(target_lat), math.radians(target_lon)
+
+    a = (
+        np.sin((lats - target_lat) / 2) ** 2
+        + math.cos(target_lat) * np.cos(lats) * np.sin((lons - target_lon) / 2) ** 2
+    )
+    distances = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return distances, distances <= radius
+
+
+# Cells of a distance matrix computed at once by `haversine_matrix`.
+MATRIX_BLOCK_SIZE = 1 << 18
+
+
+def _half_angles(degrees: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    halves = np.radians(np.asarray(degrees, dtype=np.float64)) / 2
+    return np.sin(halves), np.cos(halves)
+
+
+def haversine_matrix(
+    origin_lats: Sequence[float],
+    origin_lons: Sequence[float],
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    block_size: int = MATRIX_BLOCK_SIZE,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Vectorized `haversine` from every origin to every point, in kilometers.
+
+    Yields the index of the first origin and the rows of the matrix from
+    there, about `block_size` cells at a time, so memory stays bounded
+    however many origins there are. sin((b - a) / 2) is expanded from the
+    sines and cosines of the half angles, taken once per coordinate, which
+    leaves only the final square root and arcsine to compute per cell.
+    """
+    lat_sin, lat_cos = _half_angles(latitudes)
+    lon_sin, lon_cos = _half_angles(longitudes)
+    cos_lats = lat_cos**2 - lat_sin**2
+    origin_lat_sin, origin_lat_cos = _half_angles(origin_lats)
+    origin_lon_sin, origin_lon_cos = _half_angles(origin_lons)
+    origin_cos_lats = origin_lat_cos**2 - origin_lat_sin**2
+
+    rows = max(1, block_size // max(1, len(lat_sin)))
+    for start in range(0, len(origin_lat_sin), rows):
+        block = slice(start, start + rows)
+        dlat = np.outer(origin_lat_cos[block], lat_sin)
+        dlat -= np.outer(origin_lat_sin[block], lat_cos)
+        dlon = np.outer(origin_lon_cos[block], lon_sin)
+        dlon -= np.outer(origin_lon_sin[block], lon_cos)
+        dlon *= dlon
+        dlon *= np.outer(origin_cos_lats[block], cos_lats)
+        dlat *= dlat
+        dlat += dlon
+        np.minimum(dlat, 1.0, out=dlat)
+        np.sqrt(dlat, out=dlat)
+        np.arcsin(dlat, out=dlat)
+        dlat *= 2 * EARTH_RADIUS
+        yield start, dlat
+
+
+def nearest_in_matrix(
+    blocks: Iterable[Tuple[int, np.ndarray]], k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The column indexes and distances of the `k` smallest distances of every
+    row of a `haversine_matrix`, closest first, one block at a time.
+    """
+    indexes, distances = [], []
+    for _, block in blocks:
+        if k < block.shape[1]:
+            closest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        else:
+            closest = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+        nearest = np.take_along_axis(block, closest, axis=1)
+        order = np.argsort(nearest, axis=1, kind="stable")
+        indexes.append(np.take_along_axis(closest, order, axis=1))
+        distances.append(np.take_along_axis(nearest, order, axis=1))
+    return np.concatenate(indexes), np.concatenate(distances)
+
+
 def find_coordinates_within_radius(
-    target_lat: float, target_lon: float, address_list: Address, radius: float
+    target_lat: float, target_lon: float, address_list: List[Address], radius: float
 ) -> list:
     """
     Find all coordinates within a given radius from a target coordinate
     """
-    within_radius = []
-    for address in address_list:
-        if address.latitude != target_lat or address.longitude != target_lon:
-            distance = haversine(
-                target_lat, target_lon, address.latitude, address.longitude
-            )
-            if distance <= radius:
-                within_radius.append(address)
-    return within_radius
-
-
-def is_duplicate_lat_long(
-    crud_obj: CrudBase,
-    db: Session,
-    latitude: float,
-    longitude: float,
-    instance_id: int = None,
-):
-    """
-    Check if an address with the given latitude and longitude already exists.
-    """
-    existing_address = crud_obj.get(
-        db,
-        query_filter=and_(Address.latitude == latitude, Address.longitude == longitude),
+    if not address_list:
+        return []
+    latitudes = np.fromiter(
+        (address.latitude for address in address_list),
+        dtype=np.float64,
+        count=len(address_list),
+    )
+    longitudes = np.fromiter(
+        (address.longitude for address in address_list),
+        dtype=np.float64,
+        count=len(address_list),
+    )
+    _, mask = haversine_batch(target_lat, target_lon, latitudes, longitudes, radius)
+    mask &= (latitudes != target_lat) | (longitudes != target_lon)
+    return [address_list[index] for index in np.flatnonzero(mask)]
+
+
+Ring = Sequence[Sequence[float]]
+
+# Upper bounds on the latitude bands and grid cells per side of a `PolygonEdges`,
+# and on the (point, edge) pairs ray cast at once.
+MAX_BANDS = 4096
+MAX_GRID = 512
+PIP_BLOCK_SIZE = 1 << 20
+
+
+class PolygonEdges:
+    """
+    Even-odd point-in-polygon test against a set of (longitude, latitude)
+    rings, built once per polygon and applied to many points.
+
+    The rings' bounding box is split into a grid. Cells that no edge touches
+    are entirely inside or outside, so points in them take the answer of the
+    cell center. The other points cast a ray against the edges of their
+    latitude band only.
+    """
+
+    def __init__(self, rings: Iterable[Ring]) -> None:
+        starts, ends = [], []
+        for ring in rings:
+            points = np.asarray([position[:2] for position in ring], dtype=np.float64)
+            starts.append(points)
+            ends.append(np.roll(points, -1, axis=0))
+        start, end = np.concatenate(starts), np.concatenate(ends)
+        # Horizontal edges never cross a horizontal ray.
+        sloped = start[:, 1] != end[:, 1]
+        self.x1, self.y1 = start[sloped, 0], start[sloped, 1]
+        self.x2, self.y2 = end[sloped, 0], end[sloped, 1]
+        self.empty = not len(self.y1)
+        if self.empty:
+            return
+        self._build_bands()
+        self._build_grid(start, end)
+
+    def _build_bands(self) -> None:
+        low, high = np.minimum(self.y1, self.y2), np.maximum(self.y1, self.y2)
+        band_count = min(MAX_BANDS, len(low))
+        self.bounds = np.linspace(low.min(), high.max(), band_count + 1)
+        first = self.band_of(low)
+        spans = self.band_of(high) - first + 1
+        edges = np.repeat(np.arange(len(low)), spans)
+        bands = np.repeat(first, spans) + _offsets_within(spans)
+        self.band_edges = edges[np.argsort(bands, kind="stable")]
+        self.band_sizes = np.bincount(bands, minlength=band_count)
+        self.band_starts = np.cumsum(self.band_sizes) - self.band_sizes
+
+    def _build_grid(self, start: np.ndarray, end: np.ndarray) -> None:
+        self.south, self.north = self.bounds[0], self.bounds[-1]
+        self.west = min(start[:, 0].min(), end[:, 0].min())
+        self.east = max(start[:, 0].max(), end[:, 0].max())
+        size = self.grid_size = int(
+            min(MAX_GRID, max(16, 8 * math.ceil(math.sqrt(len(start)))))
+        )
+        self.cell_height = (self.north - self.south) / size or 1.0
+        self.cell_width = (self.east - self.west) / size or 1.0
+
+        # Count the edges whose bounding box overlaps each cell, summing a 2D
+        # difference array of the boxes' corners.
+        first_row = self.row_of(np.minimum(start[:, 1], end[:, 1]))
+        last_row = self.row_of(np.maximum(start[:, 1], end[:, 1])) + 1
+        first_column = self.column_of(np.minimum(start[:, 0], end[:, 0]))
+        last_column = self.column_of(np.maximum(start[:, 0], end[:, 0])) + 1
+        corners = np.zeros((size + 1, size + 1), dtype=np.int64)
+        np.add.at(corners, (first_row, first_column), 1)
+        np.add.at(corners, (first_row, last_column), -1)
+        np.add.at(corners, (last_row, first_column), -1)
+        np.add.at(corners, (last_row, last_column), 1)
+        touched = corners.cumsum(axis=0).cumsum(axis=1)[:size, :size] > 0
+        self.boundary_cells = touched.ravel()
+
+        # Cell centers of a row share their latitude, so they are located
+        # among the sorted crossings of that one line, all rows at once.
+        rows = np.arange(size)
+        latitudes = self.south + (rows + 0.5) * self.cell_height
+        bands = self.band_of(latitudes)
+        sizes = self.band_sizes[bands]
+        pair_rows = np.repeat(rows, sizes)
+        edges = self.band_edges[
+            np.repeat(self.band_starts[bands], sizes) + _offsets_within(sizes)
+        ]
+        crossings = self._crossings(latitudes[pair_rows], edges)
+        # Crossings of row r are keyed to [r * stride, r * stride + width].
+        stride = self.east - self.west + 1.0
+        keys = np.sort(
+            pair_rows[~np.isnan(crossings)] * stride
+            + crossings[~np.isnan(crossings)]
+            - self.west
+        )
+        centers = (np.arange(size) + 0.5) * self.cell_width
+        row_keys = rows[:, None] * stride
+        to_the_right = np.searchsorted(
+            keys, row_keys + stride - 0.5, side="right"
+        ) - np.searchsorted(keys, row_keys + centers[None, :], side="right")
+        self.inside_cells = (to_the_right % 2 == 1).ravel()
+
+    def band_of(self, latitudes: np.ndarray) -> np.ndarray:
+        """
+        The band of each latitude, or -1 outside of them all.
+        """
+        band_count = len(self.bounds) - 1
+        bands = np.searchsorted(self.bounds, latitudes, side="right") - 1
+        # The top edge of the last band belongs to it.
+        bands[latitudes == self.bounds[-1]] = band_count - 1
+        bands[bands >= band_count] = -1
+        return bands
+
+    def row_of(self, latitudes: np.ndarray) -> np.ndarray:
+        rows = ((latitudes - self.south) / self.cell_height).astype(np.int64)
+        return np.clip(rows, 0, self.grid_size - 1)
+
+    def column_of(self, longitudes: np.ndarray) -> np.ndarray:
+        columns = ((longitudes - self.west) / self.cell_width).astype(np.int64)
+        return np.clip(columns, 0, self.grid_size - 1)
+
+    def _crossings(self, latitudes: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """
+        The longitude where each of `edges` crosses the matching latitude, or
+        NaN where it does not. An edge includes its lower end only.
+        """
+        y1, y2 = self.y1[edges], self.y2[edges]
+        x1, x2 = self.x1[edges], self.x2[edges]
+        crossings = x1 + (latitudes - y1) * (x2 - x1) / (y2 - y1)
+        crossings[(y1 > latitudes) == (y2 > latitudes)] = np.nan
+        return crossings
+
+    def ray_cast(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """
+        A point is inside when a ray cast towards increasing longitudes
+        crosses the rings an odd number of times.
+        """
+        inside = np.zeros(len(latitudes), dtype=bool)
+        bands = self.band_of(latitudes)
+        points = np.flatnonzero(bands >= 0)
+        sizes = self.band_sizes[bands[points]]
+        totals = np.cumsum(sizes)
+        limit = totals[-1] if len(totals) else 0
+        splits = np.searchsorted(
+            totals, np.arange(PIP_BLOCK_SIZE, limit, PIP_BLOCK_SIZE)
+        )
+        for block, block_sizes in zip(
+            np.split(points, splits), np.split(sizes, splits)
+        ):
+            pair_points = np.repeat(np.arange(len(block)), block_sizes)
+            edges = self.band_edges[
+                np.repeat(self.band_starts[bands[block]], block_sizes)
+                + _offsets_within(block_sizes)
+            ]
+            crossings = self._crossings(latitudes[block][pair_points], edges)
+            # NaN compares false, so edges the ray misses never count.
+            crosses = longitudes[block][pair_points] < crossings
+            counts = np.bincount(pair_points, weights=crosses, minlength=len(block))
+            inside[block] = counts % 2 == 1
+        return inside
+
+    def contains(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        inside = np.zeros(len(latitudes), dtype=bool)
+        if self.empty:
+            return inside
+        points = np.flatnonzero(
+            (latitudes >= self.south)
+            & (latitudes <= self.north)
+            & (longitudes >= self.west)
+            & (longitudes <= self.east)
+        )
+        lats, lons = latitudes[points], longitudes[points]
+        cells = self.row_of(lats) * self.grid_size + self.column_of(lons)
+        boundary = self.boundary_cells[cells]
+        inside[points] = self.inside_cells[cells]
+        inside[points[boundary]] = self.ray_cast(lats[boundary], lons[boundary])
+        return inside
+
+
+def _offsets_within(sizes: np.ndarray) -> np.ndarray:
+    """
+    0, 1, ..., size - 1 for each of `sizes`, concatenated.
+    """
+    return np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+
+def rings_bounding_box(rings: Iterable[Ring]) -> BoundingBox:
+    """
+    The (min_lat, max_lat, min_lon, max_lon) box enclosing (longitude,
+    latitude) rings.
+    """
+    points = np.concatenate(
+        [np.asarray([position[:2] for position in ring]) for ring in rings]
+    )
+    return (
+        float(points[:, 1].min()),
+        float(points[:, 1].max()),
+        float(points[:, 0].min()),
+        float(points[:, 0].max()),
     )
-    if existing_address and instance_id:
-        return existing_address.id != instance_id
-    return existing_address is not None
+
+
+def boxes_contain(
+    boxes: Sequence[BoundingBox], latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    """
+    Mask of the points lying inside one of the (min_lat, max_lat, min_lon,
+    max_lon) boxes, edges included. The R*Tree only stores its boxes to
+    float32 precision, so it can return points just outside of them.
+    """
+    inside = np.zeros(len(latitudes), dtype=bool)
+    for min_lat, max_lat, min_lon, max_lon in boxes:
+        inside |= (
+            (latitudes >= min_lat)
+            & (latitudes <= max_lat)
+            & (longitudes >= min_lon)
+            & (longitudes <= max_lon)
+        )
+    return inside
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Yield successive lists of at most `size` items.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def existing_lat_long_query(coordinates: Sequence[Tuple[float, float]]):
+    """
+    Build a query returning which of the given (latitude, longitude) pairs are
+    already used by an address.
+    """
+    return select(Address.latitude, Address.longitude).where(
+        tuple_(Address.latitude, Address.longitude).in_(coordinates)
+    )
+
+
+def find_existing_lat_long(
+    db: Session, coordinates: Iterable[Tuple[float, float]], chunk_size: int = 500
+) -> Set[Tuple[float, float]]:
+    """
+    Return the (latitude, longitude) pairs that already exist, checked with one
+    set-based query per `chunk_size` pairs.
+    """
+    existing = set()
+    for chunk in chunked(coordinates, chunk_size):
+        existing.update(
+            tuple(row) for row in db.execute(existing_lat_long_query(chunk))
+        )
+    return existing
+
+
+async def find_existing_lat_long_async(
+    db: AsyncSession, coordinates: Iterable[Tuple[float, float]], chunk_size: int = 500
+) -> Set[Tuple[float, float]]:
+    """
+    Async variant of `find_existing_lat_long`.
+    """
+    existing = set()
+    for chunk in chunked(coordinates, chunk_size):
+        result = await db.execute(existing_lat_long_query(chunk))
+        existing.update(tuple(row) for row in result)
+    return existing
@@ -1,9 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from src.api.admin import router as admin_router
+from src.api.metrics import router as metrics_router
 from src.api.v1.address import router as api_router
 from src.core.config import get_app_settings
 from src.core.exceptions import add_exceptions_handlers
+from src.db.session import SessionLocal, async_engine
+from src.helpers.cache import address_cache
+from src.helpers.index_refresh import index_refresher
+from src.helpers.metrics import MetricsMiddleware, metrics
+from src.helpers.near_cache import near_cache
+from src.helpers.profiling import ProfilingMiddleware, profile_store
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Warm up the in-memory indexes before serving requests and keep them in
+    step with imports, and close the pooled connections on shutdown.
+    """
+    with SessionLocal() as session:
+        index_refresher.load(session)
+    interval = get_app_settings().index_refresh_seconds
+    refresh = asyncio.create_task(index_refresher.poll(interval)) if interval else None
+    yield
+    if refresh is not None:
+        refresh.cancel()
+    await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
@@ -12,7 +39,7 @@ def create_app() -> FastAPI:
     """
     settings = get_app_settings()
 
-    application = FastAPI(**settings.fastapi_kwargs)
+    application = FastAPI(lifespan=lifespan, **settings.fastapi_kwargs)
 
     application.add_middleware(
         CORSMiddleware,
@@ -22,6 +49,31 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if settings.profiling_enabled:
+        # Without the setting neither the middleware nor the admin routes
+        # exist, so requests pay nothing for them.
+        if not settings.profiling_token:
+            raise RuntimeError("`profiling_enabled` requires a `profiling_token`")
+        application.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            header=settings.profiling_header,
+            token=settings.profiling_token,
+            sample_rate=settings.profiling_sample_rate,
+        )
+        application.include_router(admin_router, prefix="/admin")
+
+    if settings.metrics_enabled:
+        # Added last, so it is the outermost middleware and times the others.
+        application.add_middleware(
+            MetricsMiddleware,
+            slow_request_threshold=settings.slow_request_threshold,
+            slow_request_max_statements=settings.slow_request_max_statements,
+        )
+        metrics.register_cache("addresses", address_cache.stats)
+        metrics.register_cache("near", near_cache.stats)
+        application.include_router(metrics_router)
+
     application.include_router(api_router, prefix="/api/v1")
 
     add_exceptions_handlers(app=application)
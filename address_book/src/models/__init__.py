@@ -1 +1,8 @@
-from .model import Address
+from .model import (
+    Address,
+    AddressFacet,
+    AddressImport,
+    AddressTombstone,
+    address_fts,
+    address_rtree,
+)
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, DateTime, Integer, String, Float
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Float,
+    Table,
+)
 
 # from src.models.base import Base
 # from src.core.db import Base
@@ -18,3 +28,89 @@ class Address(Base):
     longitude = Column(Float)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_addresses_latitude_longitude", "latitude", "longitude", unique=True),
+        Index("ix_addresses_updated_at_id", "updated_at", "id"),
+        # Ids are never reused, so the change feed cannot confuse a deleted
+        # address with a later one.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class AddressImport(Base):
+    __tablename__ = "address_imports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String)
+    format = Column(String)
+    status = Column(String, default="running")
+    # Input records consumed up to the last committed chunk, where a resumed
+    # import picks up.
+    rows_read = Column(Integer, default=0)
+    rows_created = Column(Integer, default=0)
+    rows_rejected = Column(Integer, default=0)
+    rejections = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class AddressFacet(Base):
+    """
+    Address counts per country, per (country, state) and per
+    (country, state, city), plus the overall total, maintained by triggers on
+    `addresses`. Missing names and the levels below a facet are stored as ''.
+    """
+
+    __tablename__ = "address_facets"
+
+    facet = Column(String, primary_key=True)
+    country = Column(String, primary_key=True)
+    state = Column(String, primary_key=True)
+    city = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_address_facets_facet_count", "facet", "count"),)
+
+
+class AddressTombstone(Base):
+    """
+    When each deleted address was deleted, recorded by a trigger on
+    `addresses` so the change feed can report deletes.
+    """
+
+    __tablename__ = "address_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (Index("ix_address_tombstones_deleted_at_id", "deleted_at", "id"),)
+
+
+# Virtual tables are created and kept in sync by migrations/triggers, so they
+# live outside `Base.metadata` and are never emitted by `create_all`.
+virtual_metadata = MetaData()
+
+address_rtree = Table(
+    "addresses_rtree",
+    virtual_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+    Column("min_lon", Float),
+    Column("max_lon", Float),
+)
+
+# FTS5 index over the text columns of `addresses`. `rank` is FTS5's hidden
+# bm25 score column and `addresses_fts` the hidden column taking MATCH queries.
+address_fts = Table(
+    "addresses_fts",
+    virtual_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("street", String),
+    Column("city", String),
+    Column("state", String),
+    Column("country", String),
+    Column("rank", Float),
+    Column("addresses_fts", String),
+)
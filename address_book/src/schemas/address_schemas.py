@@ -1,4 +1,11 @@
-from pydantic import BaseModel, validator
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, validator
+
+from src.schemas.pagination import SQLITE_INT_MAX, SQLITE_INT_MIN, is_sqlite_int
+
+SQLiteInt = Annotated[int, Field(ge=SQLITE_INT_MIN, le=SQLITE_INT_MAX)]
 
 
 class LocationMixin:
@@ -10,7 +17,8 @@ class LocationMixin:
     def validate_latitude(cls, value):
         if not value:
             raise ValueError("latitude cannot be empty")
-        if value < -90 or value > 90:
+        # Also false for NaN, unlike `value < -90 or value > 90`.
+        if not -90 <= value <= 90:
             raise ValueError("Latitude value must be in between -90 and 90")
         return value
 
@@ -18,7 +26,7 @@ class LocationMixin:
     def validate_longitude(cls, value):
         if not value:
             raise ValueError("longitude cannot be empty")
-        if value < -180 or value > 180:
+        if not -180 <= value <= 180:
             raise ValueError("Longitude value must be in between -180 and 180")
         return value
 
@@ -76,6 +84,19 @@ class AddressUpdate(LocationMixin, AddressBase):
     pass
 
 
+class AddressPatch(LocationMixin, BaseModel):
+    """
+    Model for partially updating an address: only the fields sent are written.
+    """
+
+    street: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
 class AddressOut(AddressBase):
     """
     Model for outputting an address.
@@ -87,6 +108,70 @@ class AddressOut(AddressBase):
         from_attributes = True
 
 
+class SparseFieldsSchema(BaseModel):
+    """
+    Model for a comma separated subset of the `AddressOut` fields to return.
+    """
+
+    fields: Optional[str] = None
+
+    @validator("fields")
+    def validate_fields(cls, value):
+        if value is not None:
+            names = cls.parse_fields(value)
+            if not names or set(names) - set(AddressOut.model_fields):
+                raise ValueError(
+                    "fields must be a comma separated list of "
+                    + ", ".join(AddressOut.model_fields)
+                )
+        return value
+
+    @staticmethod
+    def parse_fields(value: str) -> Tuple[str, ...]:
+        names = (name.strip() for name in value.split(","))
+        return tuple(dict.fromkeys(name for name in names if name))
+
+    @property
+    def selected(self) -> Optional[Tuple[str, ...]]:
+        """
+        The requested field names, in order and without duplicates.
+        """
+        return self.parse_fields(self.fields) if self.fields is not None else None
+
+
+class AddressIdsSchema(BaseModel):
+    """
+    Model for a comma separated list of address ids to fetch at once.
+    """
+
+    ids: Optional[str] = None
+
+    @validator("ids")
+    def validate_ids(cls, value):
+        if value is not None:
+            try:
+                ids = cls.parse_ids(value)
+                if not ids or not all(is_sqlite_int(item_id) for item_id in ids):
+                    raise ValueError
+            except ValueError:
+                raise ValueError(
+                    "ids must be a comma separated list of 64-bit integers"
+                )
+        return value
+
+    @staticmethod
+    def parse_ids(value: str) -> Tuple[int, ...]:
+        ids = (int(part) for part in value.split(",") if part.strip())
+        return tuple(dict.fromkeys(ids))
+
+    @property
+    def selected(self) -> Optional[Tuple[int, ...]]:
+        """
+        The requested ids, in order and without duplicates.
+        """
+        return self.parse_ids(self.ids) if self.ids is not None else None
+
+
 class NearBySchema(LocationMixin, BaseModel):
     """
     Model for nearby locations filter with validation mixins.
@@ -94,4 +179,244 @@ class NearBySchema(LocationMixin, BaseModel):
 
     latitude: float
     longitude: float
-    radius: float
+    radius: float = Field(ge=0, allow_inf_nan=False)
+
+
+class AddressDistanceOut(AddressOut):
+    """
+    Model for outputting an address with its distance, in kilometers, from a
+    queried location.
+    """
+
+    distance: float
+
+
+class AddressSearchOut(AddressOut):
+    """
+    Model for outputting an address with its full text search rank, lower
+    being more relevant.
+    """
+
+    rank: float
+
+
+class AddressSearchSchema(BaseModel):
+    """
+    Model for full text address search.
+    """
+
+    q: str = Field(min_length=1, max_length=200)
+    limit: int = Field(10, ge=1, le=100)
+    cursor: Optional[str] = None
+
+    @validator("q")
+    def validate_q(cls, value):
+        value = value.strip()
+        if not value:
+            raise ValueError("q must contain at least one word")
+        return value
+
+
+class SuggestSchema(BaseModel):
+    """
+    Model for locality name autocomplete.
+    """
+
+    field: Literal["city", "state", "country"]
+    prefix: str = Field(min_length=1, max_length=100)
+    limit: int = Field(10, ge=1, le=50)
+
+
+class Suggestion(BaseModel):
+    """
+    Model for outputting a suggested name with its number of addresses.
+    """
+
+    value: str
+    count: int
+
+
+class FacetSchema(BaseModel):
+    """
+    Model for address count facets, optionally narrowed to a country and state.
+    """
+
+    facet: Literal["country", "state", "city"] = "country"
+    country: Optional[str] = None
+    state: Optional[str] = None
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class FacetCount(BaseModel):
+    """
+    Model for outputting the number of addresses in a country, state or city.
+    """
+
+    country: str
+    state: Optional[str] = None
+    city: Optional[str] = None
+    count: int
+
+
+class NearestSchema(LocationMixin, BaseModel):
+    """
+    Model for k-nearest addresses filter with validation mixins.
+    """
+
+    latitude: float
+    longitude: float
+    k: int = Field(10, ge=1, le=100)
+
+
+class GeoJSONPolygon(BaseModel):
+    """
+    Model for a GeoJSON Polygon or MultiPolygon geometry, with positions given
+    as [longitude, latitude].
+    """
+
+    type: Literal["Polygon", "MultiPolygon"]
+    coordinates: Union[List[List[List[float]]], List[List[List[List[float]]]]]
+
+    @validator("coordinates")
+    def validate_coordinates(cls, value, values):
+        multi = values.get("type") == "MultiPolygon"
+        # The union accepts either nesting, whatever the type says.
+        depth, first = 0, value
+        while isinstance(first, list) and first:
+            depth, first = depth + 1, first[0]
+        if not isinstance(first, list) and depth != (4 if multi else 3):
+            raise ValueError(f"coordinates are not nested as a {values.get('type')}")
+        polygons = value if multi else [value]
+        for polygon in polygons:
+            if not polygon:
+                raise ValueError("a polygon needs at least one ring")
+            for ring in polygon:
+                if len(ring) < 3:
+                    raise ValueError("a ring needs at least three positions")
+                for position in ring:
+                    if len(position) < 2:
+                        raise ValueError("a position is [longitude, latitude]")
+                    longitude, latitude = position[:2]
+                    if not -180 <= longitude <= 180 or not -90 <= latitude <= 90:
+                        raise ValueError(
+                            "positions must be [longitude, latitude] within "
+                            "[-180, 180] and [-90, 90]"
+                        )
+        return value
+
+    @property
+    def rings(self) -> List[List[List[float]]]:
+        """
+        The rings of every polygon: outer rings and holes alike.
+        """
+        if self.type == "Polygon":
+            return self.coordinates
+        return [ring for polygon in self.coordinates for ring in polygon]
+
+
+class WithinSchema(BaseModel):
+    """
+    Model for a containment query: either a GeoJSON `polygon` or a `bbox` of
+    [west, south, east, north], where west > east crosses the antimeridian.
+    """
+
+    polygon: Optional[GeoJSONPolygon] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None
+
+    @validator("bbox", always=True)
+    def validate_bbox(cls, value, values):
+        if (value is None) == (values.get("polygon") is None):
+            raise ValueError("exactly one of polygon and bbox must be given")
+        if value is not None:
+            west, south, east, north = value
+            if not -180 <= west <= 180 or not -180 <= east <= 180:
+                raise ValueError("bbox longitudes must be in between -180 and 180")
+            if not -90 <= south <= north <= 90:
+                raise ValueError(
+                    "bbox latitudes must be in between -90 and 90, south first"
+                )
+        return value
+
+
+class Coordinate(LocationMixin, BaseModel):
+    """
+    Model for a location that is not a stored address.
+    """
+
+    latitude: float
+    longitude: float
+
+
+class DistanceMatrixSchema(BaseModel):
+    """
+    Model for the distances from `origins` to the addresses `ids`, all of
+    them or only the `k` closest to each origin.
+    """
+
+    origins: List[Coordinate] = Field(min_length=1)
+    ids: List[SQLiteInt] = Field(min_length=1)
+    k: Optional[int] = Field(None, ge=1, le=100)
+
+    @property
+    def selected(self) -> Tuple[int, ...]:
+        """
+        The requested ids, in order and without duplicates.
+        """
+        return tuple(dict.fromkeys(self.ids))
+
+
+class DistanceMatrixOut(BaseModel):
+    """
+    Model for outputting the distances, in kilometers, from each origin to
+    each of `ids`, one row per origin flattened in row-major order.
+    """
+
+    ids: List[int]
+    distances: List[float]
+
+
+class NearestIdsOut(BaseModel):
+    """
+    Model for outputting, for each origin, the ids of the closest addresses
+    and their distances in kilometers, closest first.
+    """
+
+    ids: List[List[int]]
+    distances: List[List[float]]
+
+
+class BulkCreateResult(BaseModel):
+    """
+    Model for the outcome of one item of a bulk create.
+    """
+
+    index: int
+    status: Literal["created", "conflict"]
+    id: Optional[int] = None
+    message: Optional[str] = None
+
+
+class ChangesSchema(BaseModel):
+    """
+    Model for reading the change feed from the token of a previous page.
+    """
+
+    since: Optional[str] = None
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class AddressChange(BaseModel):
+    """
+    Model for outputting a created or updated address, or a deleted address
+    id with `deleted` set and no other fields.
+    """
+
+    id: int
+    deleted: bool
+    changed_at: datetime
+    street: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
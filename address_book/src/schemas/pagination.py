@@ -1,6 +1,75 @@
+import base64
+import binascii
+import json
+import math
+from typing import Any, List, Literal, Optional, Sequence
+
 from pydantic import BaseModel, PositiveInt
 
+# Range of an SQLite INTEGER; larger Python ints cannot be bound.
+SQLITE_INT_MIN = -(2**63)
+SQLITE_INT_MAX = 2**63 - 1
+
 
 class SkipLimit(BaseModel):
     page: int = 1
     limit: PositiveInt = 10
+
+
+class CursorParams(BaseModel):
+    cursor: Optional[str] = None
+    sort: Literal["id", "city"] = "id"
+
+
+def is_sqlite_int(value: Any) -> bool:
+    """
+    Whether `value` is an int, not a bool, that fits in an SQLite INTEGER.
+    """
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and SQLITE_INT_MIN <= value <= SQLITE_INT_MAX
+    )
+
+
+def is_cursor_value(value: Any) -> bool:
+    """
+    Whether `value` is a scalar SQL can compare a sort key column with: a
+    string, an SQLite integer or a finite float.
+    """
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, str) or is_sqlite_int(value)
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """
+    Pack the sort key of the last row of a page into an opaque cursor.
+    """
+    payload = json.dumps({"sort": sort, "after": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: Optional[int] = None) -> List[Any]:
+    """
+    Unpack a cursor made by `encode_cursor` for the same `sort`. With `size`,
+    the cursor must hold exactly that many scalar values, one per sort key
+    column, as it is compared with them in SQL.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        after = payload["after"]
+        if (
+            payload["sort"] == sort
+            and isinstance(after, list)
+            and (
+                size is None
+                or len(after) == size
+                and all(is_cursor_value(value) for value in after)
+            )
+        ):
+            return after
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        pass
+    raise ValueError("invalid cursor")
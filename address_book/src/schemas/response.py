@@ -1,5 +1,6 @@
-from typing import Any, Dict, Generic, Optional, TypeVar
+from typing import Any, Generic, List, Optional, TypeVar
 
+from pydantic import model_serializer
 from pydantic.generics import GenericModel
 
 ResponseData = TypeVar("ResponseData")
@@ -10,8 +11,11 @@ class Response(GenericModel, Generic[ResponseData]):
     data: Optional[ResponseData] = None
     message: Optional[str] = None
     errors: Optional[list] = None
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    missing: Optional[List[Any]] = None
 
-    def dict(self, *args, **kwargs) -> Dict[str, Any]:
-        """Exclude `null` values from the response."""
-        kwargs.pop("exclude_none", None)
-        return super().dict(*args, exclude_none=True, **kwargs)
+    @model_serializer(mode="wrap")
+    def exclude_none(self, handler):
+        """Exclude `null` envelope fields from the response."""
+        return {key: value for key, value in handler(self).items() if value is not None}